@@ -5,15 +5,18 @@ import json
 import uuid
 import time
 import datetime
+import threading
 import traceback
 import logging
 from pathlib import Path
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from contextlib import suppress
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
@@ -38,8 +41,22 @@ STATE_ROOT.mkdir(exist_ok=True)
 
 # --- Import search modules ---
 try:
-    from tools.data_tool.search.search_by_text import search_with_rrf_pricelens
-    from tools.data_tool.search.search_by_image import search_image_with_rrf_pricelens
+    from tools.data_tool.search.search_by_text import (
+        search_with_rrf_pricelens, search_batch_with_rrf_pricelens, query_cache, text_batcher, cascade_counts
+    )
+    from tools.data_tool.search.search_by_image import (
+        search_image_with_rrf_pricelens, image_digest, image_cache, image_batcher, InvalidImageError
+    )
+    from tools.data_tool.search.warmup import warm_up
+    from tools.data_tool.search.index_watcher import IndexWatcher
+    from tools.data_tool.search.filters import SearchFilters
+    from tools.data_tool.search.result_cache import ResultCache
+    from tools.data_tool.search.bounded_executor import BoundedExecutor, Overloaded
+    from tools.data_tool.search.metrics import CONTENT_TYPE, REGISTRY, counter, gauge, span
+    from tools.data_tool.search.vector_index import ALL_CATEGORIES, get_index, index_generation
+    from tools.data_tool.text_utils import normalize_text
+    from tools.data_tool.catalog import catalog_version, get_catalog
+    from tools.data_tool.model_registry import resident_models
     logger.info("✅ Arama modülleri import edildi.")
 except ImportError as e:
     logger.error(f"❌ Arama modülleri import edilemedi: {e}")
@@ -65,52 +82,141 @@ app.add_middleware(
 # Static files
 app.mount("/static", StaticFiles(directory=str(DUKKANS_DIR)), name="static")
 
+# --- Startup ---
+# Port hemen bağlanır; indeks ve modeller arka planda yüklenir, /health "ready" ile bildirir
+search_ready = threading.Event()
+startup_info = {"started_at": datetime.datetime.now().isoformat(), "timings": {}, "error": None}
+
+# Ürün dosyaları / vektörler değişince indeks arka planda yenilenir (pipeline sonrası restart gerekmez)
+_hr_cfg = config.get_search_config().get("hot_reload", {}) or {}
+index_watcher = IndexWatcher(debounce_ms=_hr_cfg.get("debounce_ms", 1600)) if _hr_cfg.get("enabled", True) else None
+
+def _warm_up_search():
+    """Katalog, indeks ve modelleri arka planda yükle"""
+    try:
+        startup_info["timings"] = warm_up(load_models=api_config.get("preload_models", True))
+        search_ready.set()
+        logger.info(f"✅ Arama hazır: {startup_info['timings']}")
+        if index_watcher is not None:
+            index_watcher.start()
+    except Exception as e:
+        startup_info["error"] = str(e)
+        logger.error(f"❌ Warm-up hatası: {e}\n{traceback.format_exc()}")
+
+@app.on_event("startup")
+async def start_warm_up():
+    threading.Thread(target=_warm_up_search, name="search-warmup", daemon=True).start()
+
+@app.on_event("shutdown")
+async def persist_caches():
+    """Sorgu embedding cache'ini yeniden başlatmada kaybolmasın diye diske yaz"""
+    if index_watcher is not None:
+        index_watcher.stop()
+    for executor in search_executors.values():
+        executor.shutdown()
+    if query_cache is not None:
+        with suppress(Exception):
+            query_cache.save()
+
 # --- Constants from config ---
 KATEGORILER = config.get_category_names()
+BATCH_MAX_QUERIES = (config.get_search_config().get("batch", {}) or {}).get("max_queries", 1000)
+
+# Biçimlenmiş sonuç cache'i: anahtar = normalize sorgu/görsel özeti + parametreler,
+# sürüm = katalog sürümü (ürün dosyası imzaları) + indeks kuşağı; ikisinden biri değişince tümü düşer.
+# İkisi de sadece okunur (dosya stat'ı / JSON ayrıştırma yok): yenileme izleyici ve arama thread'lerinde
+_rc_cfg = config.get_search_config().get("result_cache", {}) or {}
+result_cache = None
+if _rc_cfg.get("enabled", True):
+    result_cache = ResultCache(max_size=_rc_cfg.get("max_size", 5000), ttl_seconds=_rc_cfg.get("ttl_seconds", 600))
+
+def _result_version() -> str:
+    return f"{catalog_version()}|{index_generation()}"
+
+def _cache_get(key: tuple):
+    """(sürüm, cache'teki sonuç ya da None)"""
+    if result_cache is None:
+        return None, None
+    version = _result_version()
+    return version, result_cache.get(key, version)
+
+def _cache_put(key: tuple, version: Optional[str], value: dict):
+    """
+    Sadece arama süresince katalog ve indeks değişmediyse yaz: katalog yenilenip indeks henüz
+    değişmemişken (ya da arama sırasında değiştiyse) sonuç eski indeksten gelmiş olabilir.
+    """
+    if result_cache is not None and version is not None and version == _result_version():
+        result_cache.put(key, value, version)
+
+# Arama işleri event loop dışında, yol başına ayrı ve sınırlı havuzlarda (yavaş görsel araması
+# metin aramalarını ve /health'i bloklamaz); doluysa 429/503 + Retry-After
+_ex_cfg = api_config.get("executors", {}) or {}
+
+def _executor(name: str, max_workers: int, max_queue: int, max_wait_ms: float, batcher=None) -> BoundedExecutor:
+    cfg = _ex_cfg.get(name, {}) or {}
+    workers = int(cfg.get("max_workers", max_workers))
+    # Her iş encode batcher'ında bloklanır: bir batch en fazla havuzdaki thread sayısı kadar istek toplar
+    if batcher is not None and workers < batcher.max_batch_size:
+        logger.warning(f"api.executors.{name}.max_workers={workers} < batch boyu {batcher.max_batch_size}; "
+                       f"batch dolabilsin diye {batcher.max_batch_size}'e çıkarıldı")
+        workers = batcher.max_batch_size
+    return BoundedExecutor(f"{name}-search", workers,
+                           cfg.get("max_queue", max_queue), cfg.get("max_wait_ms", max_wait_ms))
+
+search_executors = {
+    "text": _executor("text", 32, 64, 2000, batcher=text_batcher),
+    "text_batch": _executor("text_batch", 1, 4, 0),
+    "image": _executor("image", 8, 16, 3000, batcher=image_batcher),
+}
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    logger.warning(f"⏳ Yük atıldı: {e}")
+    return HTTPException(
+        status_code=e.status_code,
+        detail=f"Sunucu yoğun, {e.retry_after} sn sonra tekrar deneyin.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+# Uçtan uca süre (cache isabeti / kaçırması ayrı); aşama süreleri search_stage_seconds'ta
+REQUEST_SECONDS = REGISTRY.histogram(
+    "search_request_seconds", "Arama isteği toplam süresi (saniye)", ("search", "cache"),
+)
+
+def _respond(search: str, payload: dict, start_time: float, cache_hit: bool) -> JSONResponse:
+    """Cevabı JSON'a çevir (serialize aşaması olarak ölçülür) ve toplam süreyi kaydet"""
+    with span(search, "serialize"):
+        response = JSONResponse(content=jsonable_encoder(payload))
+    REQUEST_SECONDS.observe(time.time() - start_time, search=search, cache="hit" if cache_hit else "miss")
+    return response
+
+
 TRACKING_FILE = STATE_ROOT / "tracking.json"
 
-def _validate_category(cat: str):
-    """Kategori geçerliliğini kontrol et"""
+# Warm-up bitene kadar arama uçları 503 + Retry-After döner (istek indeks / model yüklemesinde bloklanmaz)
+NOT_READY_RETRY_AFTER = 5
+
+def _require_ready():
+    if not search_ready.is_set():
+        detail = "Arama başlatılamadı." if startup_info["error"] else "Arama hazırlanıyor, kısa süre sonra tekrar deneyin."
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(NOT_READY_RETRY_AFTER)})
+
+def _validate_category(cat: str, allow_all: bool = False):
+    """Kategori geçerliliğini kontrol et (arama uçları "all" da kabul eder)"""
+    if allow_all and cat == ALL_CATEGORIES:
+        return
     if not config.is_valid_category(cat):
-        valid_categories = ", ".join(KATEGORILER)
+        valid_categories = ", ".join(KATEGORILER + ([ALL_CATEGORIES] if allow_all else []))
         raise HTTPException(
             status_code=400, 
             detail=f"Geçersiz kategori: {cat}. Geçerli kategoriler: {valid_categories}"
         )
 
 def _load_product_from_shop(shop: str, product_id: str, category: Optional[str]) -> Optional[dict]:
-    """Belirli mağazadan product_id'yi canlı JSON'dan getirir."""
-    shop_data_path = config.get_shop_data_path(shop)
-    if not shop_data_path:
+    """Belirli mağazadan product_id'yi katalog indeksinden (güncel kayıt) getirir."""
+    if not config.get_shop_data_path(shop):
         logger.warning(f"Shop '{shop}' için data path bulunamadı")
         return None
-    
-    product_dir = shop_data_path / "product"
-    if not product_dir.exists():
-        logger.warning(f"Product directory bulunamadı: {product_dir}")
-        return None
-    
-    # Kategori belirtilmişse sadece o dosyaya bak, yoksa tüm dosyalara bak
-    if category:
-        category_config = config.get(f"categories.{category}")
-        if category_config and "product_file" in category_config:
-            files = [product_dir / category_config["product_file"].split("/")[-1]]
-        else:
-            files = [product_dir / f"{category}.json"]
-    else:
-        files = list(product_dir.glob("*.json"))
-    
-    for p in files:
-        if not p.exists():
-            continue
-        with suppress(Exception):
-            items = json.loads(p.read_text(encoding="utf-8"))
-            for it in items:
-                if it.get("id") == product_id:
-                    it = dict(it)
-                    it["dukkan"] = shop
-                    return it
-    return None
+    return get_catalog().get(shop, product_id, category)
 
 def _atomic_write_json(path: Path, data: list):
     """Atomic JSON write işlemi"""
@@ -130,10 +236,27 @@ def _safe_read_json_list(path: Path) -> list:
     return []
 
 # --- Pydantic Models ---
+class SearchFilter(BaseModel):
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    brands: Optional[List[str]] = None   # herhangi biri
+    colors: Optional[List[str]] = None   # herhangi biri ("blue" → "navy blue" da eşleşir)
+    size: Optional[str] = None           # bu beden stokta olmalı
+
+    def to_filters(self) -> SearchFilters:
+        return SearchFilters(self.min_price, self.max_price, self.brands, self.colors, self.size)
+
 class TextSearchRequest(BaseModel):
     query: str
     category: str
     top_n: Optional[int] = 5
+    filters: Optional[SearchFilter] = None
+
+class BatchTextSearchRequest(BaseModel):
+    queries: List[str]
+    category: str
+    top_n: Optional[int] = 5
+    filters: Optional[SearchFilter] = None
 
 class TrackRequest(BaseModel):
     user_identifier: str
@@ -151,6 +274,7 @@ async def root():
         "message": "SocialScanAI API çalışıyor!", 
         "version": app.version,
         "available_categories": KATEGORILER,
+        "search_categories": KATEGORILER + [ALL_CATEGORIES],
         "available_shops": list(config.get_shops().keys())
     }
 
@@ -163,8 +287,10 @@ def format_search_results(final_results, product_variants, *, category: str):
     best = product_variants[0]
     best_pid = (best.get("item_data") or {}).get("id")
     best_shop = best.get("dukkan")
+    # "all" aramasında ürünün gerçek kategorisi kayıttan gelir
+    best_category = (best.get("item_data") or {}).get("kategori", category)
 
-    live_best = _load_product_from_shop(best_shop, best_pid, category) or (best.get("item_data") or {})
+    live_best = _load_product_from_shop(best_shop, best_pid, best_category) or (best.get("item_data") or {})
 
     # Image URL oluştur
     image_url = None
@@ -179,6 +305,7 @@ def format_search_results(final_results, product_variants, *, category: str):
         "name": live_best.get("name"),
         "brand": live_best.get("brand"),
         "shop": best_shop,
+        "category": best_category,
         "price": best.get("price"),
         "rating": best.get("rating"),
         "pricelens_score": round(best.get("pricelens_score", 0.0), 4),
@@ -196,72 +323,210 @@ def format_search_results(final_results, product_variants, *, category: str):
 
     return {"best_offer": best_offer, "other_offers": other_offers}
 
+# --- Search Jobs (havuz thread'lerinde çalışır) ---
+def _run_text_search(query: str, category: str, top_n: int, filters: Optional[SearchFilters]) -> dict:
+    final_results, product_variants = search_with_rrf_pricelens(
+        query, category, top_n, api_mode=True, filters=filters
+    )
+    with span("text", "format"):
+        return format_search_results(final_results, product_variants, category=category)
+
+def _run_text_search_batch(queries: List[str], category: str, top_n: int,
+                           filters: Optional[SearchFilters]) -> List[dict]:
+    results = search_batch_with_rrf_pricelens(queries, category, top_n, filters=filters)
+    with span("text_batch", "format"):
+        return [
+            format_search_results(final_results, product_variants, category=category)
+            for final_results, product_variants in results
+        ]
+
+def _run_image_search(image_bytes: bytes, image_hash: str, category: str, top_n: int,
+                      filters: Optional[SearchFilters]) -> dict:
+    # Görsel bellekten decode edilir (geçici dosya yok); aynı görsel tekrar yüklenirse CLIP forward atlanır
+    final_results, product_variants = search_image_with_rrf_pricelens(
+        image_bytes, category, top_n, api_mode=True, image_hash=image_hash, filters=filters
+    )
+    with span("image", "format"):
+        return format_search_results(final_results, product_variants, category=category)
+
 # --- Search Endpoints ---
 @app.post("/api/search/text")
 async def text_search(request: TextSearchRequest):
-    """Text tabanlı ürün arama"""
-    _validate_category(request.category)
+    """Text tabanlı ürün arama (category="all" → tüm kategoriler tek geçişte)"""
+    _require_ready()
+    _validate_category(request.category, allow_all=True)
     start_time = time.time()
     
     logger.info(f"🔍 Text search: '{request.query}' in category '{request.category}'")
     
     try:
-        final_results, product_variants = search_with_rrf_pricelens(
-            request.query, request.category, request.top_n, api_mode=True
-        )
-        formatted = format_search_results(final_results, product_variants, category=request.category)
+        filters = request.filters.to_filters() if request.filters else None
+        cache_key = ("text", normalize_text(request.query), request.category, request.top_n,
+                     filters.key() if filters else None)
+        version, formatted = _cache_get(cache_key)
+        cache_hit = formatted is not None
+        if formatted is None:
+            formatted = await search_executors["text"].run(
+                _run_text_search, request.query, request.category, request.top_n, filters
+            )
+            _cache_put(cache_key, version, formatted)
         
         processing_time = round(time.time() - start_time, 3)
         logger.info(f"✅ Text search completed in {processing_time}s")
         
-        return {
+        return _respond("text", {
             "success": True,
             "best_offer": formatted["best_offer"],
             "other_offers": formatted["other_offers"],
             "processing_time": processing_time
-        }
+        }, start_time, cache_hit)
+    except Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.error(f"❌ Metin arama hatası: {e}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Sunucu hatası oluştu.")
 
+@app.post("/api/search/text/batch")
+async def text_search_batch(request: BatchTextSearchRequest):
+    """Çok sayıda sorgu tek çağrıda: toplu encode + sorgu matrisi × katalog matrisi tarama"""
+    _require_ready()
+    _validate_category(request.category, allow_all=True)
+    if len(request.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"En fazla {BATCH_MAX_QUERIES} sorgu gönderilebilir ({len(request.queries)} geldi)."
+        )
+    start_time = time.time()
+
+    logger.info(f"🔍 Batch text search: {len(request.queries)} sorgu in category '{request.category}'")
+
+    try:
+        filters = request.filters.to_filters() if request.filters else None
+        filter_key = filters.key() if filters else None
+        keys = [("text", normalize_text(q), request.category, request.top_n, filter_key) for q in request.queries]
+        cached = [_cache_get(key) for key in keys]
+
+        # Sadece cache'te olmayan sorgular aranır
+        misses = [i for i, (_, formatted) in enumerate(cached) if formatted is None]
+        formatted_all = [formatted for _, formatted in cached]
+        if misses:
+            batch_results = await search_executors["text_batch"].run(
+                _run_text_search_batch, [request.queries[i] for i in misses], request.category, request.top_n, filters
+            )
+            for i, formatted in zip(misses, batch_results):
+                formatted_all[i] = formatted
+                _cache_put(keys[i], cached[i][0], formatted)
+
+        results = [{
+            "query": query,
+            "best_offer": formatted["best_offer"],
+            "other_offers": formatted["other_offers"],
+        } for query, formatted in zip(request.queries, formatted_all)]
+
+        processing_time = round(time.time() - start_time, 3)
+        logger.info(f"✅ Batch text search completed in {processing_time}s")
+
+        return _respond("text_batch", {
+            "success": True,
+            "results": results,
+            "processing_time": processing_time
+        }, start_time, not misses)
+    except Overloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"❌ Toplu metin arama hatası: {e}\n{traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Sunucu hatası oluştu.")
+
+# Görsel yükleme sınırı: Content-Length ile baştan, okurken de parça parça denetlenir
+_iu_cfg = config.get_search_config().get("image_upload", {}) or {}
+IMAGE_MAX_BYTES = int(_iu_cfg.get("max_bytes", 15 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # form alanları + sınır satırları
+
+def _too_large_detail() -> str:
+    return f"Görsel en fazla {IMAGE_MAX_BYTES // (1024 * 1024)} MB olabilir."
+
+@app.middleware("http")
+async def limit_image_upload(request: Request, call_next):
+    """Beyan edilen gövde sınırı aşıyorsa multipart ayrıştırılmadan 413 dön"""
+    if request.url.path == "/api/search/image":
+        with suppress(ValueError):
+            if int(request.headers.get("content-length", 0)) > IMAGE_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+                return JSONResponse(status_code=413, content={"detail": _too_large_detail()})
+    return await call_next(request)
+
+async def _read_upload(upload: UploadFile) -> bytes:
+    """Yüklemeyi parça parça oku; IMAGE_MAX_BYTES aşılınca okumayı kes (chunked gövdeler için)"""
+    chunks, total = [], 0
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > IMAGE_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=_too_large_detail())
+        chunks.append(chunk)
+    if not total:
+        raise HTTPException(status_code=400, detail="Boş görsel yüklendi.")
+    return b"".join(chunks)
+
+def _split_form_list(value: Optional[str]) -> Optional[List[str]]:
+    """Form alanındaki virgülle ayrılmış listeyi ayır"""
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
 @app.post("/api/search/image")
-async def image_search(category: str = Form(...), image: UploadFile = File(...), top_n: int = Form(5)):
-    """Image tabanlı ürün arama"""
-    _validate_category(category)
+async def image_search(
+    category: str = Form(...),
+    image: UploadFile = File(...),
+    top_n: int = Form(5),
+    min_price: Optional[float] = Form(None),
+    max_price: Optional[float] = Form(None),
+    brands: Optional[str] = Form(None),   # virgülle ayrılmış
+    colors: Optional[str] = Form(None),   # virgülle ayrılmış
+    size: Optional[str] = Form(None),
+):
+    """
+    Image tabanlı ürün arama (category="all" → tüm kategoriler tek geçişte).
+    Görsel byte'ları decode için bellekte tutulur; search.image_upload.max_bytes'ı aşan yükleme
+    Content-Length'te ya da okunurken kesilip 413 döner.
+    """
+    _require_ready()
+    _validate_category(category, allow_all=True)
+    filters = SearchFilters(min_price, max_price, _split_form_list(brands), _split_form_list(colors), size)
     
-    import tempfile
     start_time = time.time()
     logger.info(f"🖼️ Image search: {image.filename} in category '{category}'")
 
-    temp_image_path = None
+    image_bytes = await _read_upload(image)
     try:
-        # Geçici dosya oluştur
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-            tmp.write(await image.read())
-            temp_image_path = tmp.name
-
-        final_results, product_variants = search_image_with_rrf_pricelens(
-            temp_image_path, category, top_n, api_mode=True
-        )
-        formatted = format_search_results(final_results, product_variants, category=category)
+        image_hash = image_digest(image_bytes)
+        cache_key = ("image", image_hash, category, top_n, filters.key())
+        version, formatted = _cache_get(cache_key)
+        cache_hit = formatted is not None
+
+        if formatted is None:
+            formatted = await search_executors["image"].run(
+                _run_image_search, image_bytes, image_hash, category, top_n, filters
+            )
+            _cache_put(cache_key, version, formatted)
         
         processing_time = round(time.time() - start_time, 3)
         logger.info(f"✅ Image search completed in {processing_time}s")
         
-        return {
+        return _respond("image", {
             "success": True,
             "best_offer": formatted["best_offer"],
             "other_offers": formatted["other_offers"],
             "processing_time": processing_time
-        }
+        }, start_time, cache_hit)
+    except Overloaded as e:
+        raise _overloaded(e)
+    except InvalidImageError as e:
+        logger.warning(f"⚠️ {e}")
+        raise HTTPException(status_code=400, detail="Görsel okunamadı; JPEG, PNG veya WebP yükleyin.")
     except Exception as e:
         logger.error(f"❌ Görsel arama hatası: {e}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Sunucu hatası oluştu.")
-    finally:
-        # Geçici dosyayı temizle
-        with suppress(Exception):
-            if temp_image_path and os.path.exists(temp_image_path):
-                os.unlink(temp_image_path)
 
 @app.post("/api/track")
 async def track_product(request: TrackRequest):
@@ -315,14 +580,85 @@ async def track_product(request: TrackRequest):
 # --- Health Check ---
 @app.get("/health")
 async def health_check():
-    """Sistem sağlık kontrolü"""
-    return {
-        "status": "healthy",
+    """Sistem sağlık kontrolü; warm-up bitene kadar (ya da başarısızsa) 503, yük dengeleyici trafik yönlendirmez"""
+    ready = search_ready.is_set()
+    status = "healthy" if ready else ("failed" if startup_info["error"] else "starting")
+    return JSONResponse(status_code=200 if ready else 503, content=jsonable_encoder({
+        "status": status,
+        "ready": ready,
+        "startup": startup_info,
         "timestamp": datetime.datetime.now().isoformat(),
         "config_loaded": True,
         "categories": len(KATEGORILER),
-        "shops": len(config.get_shops())
-    }
+        "shops": len(config.get_shops()),
+        "query_cache": query_cache.stats() if query_cache is not None else None,
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "image_cache": image_cache.stats() if image_cache is not None else None,
+        "models": resident_models(),
+        "cascade": cascade_counts(),
+        "index_reload": index_watcher.stats() if index_watcher is not None else None,
+        "executors": {name: executor.stats() for name, executor in search_executors.items()},
+        "batching": {
+            "text": text_batcher.stats() if text_batcher is not None else None,
+            "image": image_batcher.stats() if image_batcher is not None else None,
+        },
+    }))
+
+# --- Metrics ---
+def _collect_metrics():
+    """Kazıma anında: cache isabetleri, havuz kuyrukları, indeks boyutları (Prometheus ailesi olarak)"""
+    caches = {"query": query_cache, "result": result_cache, "image": image_cache}
+    cache_stats = {name: c.stats() for name, c in caches.items() if c is not None}
+    yield counter("search_cache_hits_total", "Cache isabetleri",
+                  [({"cache": name}, st["hits"]) for name, st in cache_stats.items()])
+    yield counter("search_cache_misses_total", "Cache kaçırmaları",
+                  [({"cache": name}, st["misses"]) for name, st in cache_stats.items()])
+    yield gauge("search_cache_hit_ratio", "Cache isabet oranı (başlangıçtan beri)",
+                [({"cache": name}, st["hit_rate"]) for name, st in cache_stats.items()])
+    yield gauge("search_cache_entries", "Cache'teki kayıt sayısı",
+                [({"cache": name}, st["size"]) for name, st in cache_stats.items()])
+
+    pool_stats = {executor.name: executor.stats() for executor in search_executors.values()}
+    yield gauge("search_executor_queued", "Havuz kuyruğunda bekleyen iş",
+                [({"pool": name}, st["queued"]) for name, st in pool_stats.items()])
+    yield gauge("search_executor_running", "Havuzda çalışan iş",
+                [({"pool": name}, st["running"]) for name, st in pool_stats.items()])
+    for field, help_text in (("rejected", "Kuyruk dolu diye reddedilen iş (429)"),
+                             ("shed", "Kuyrukta fazla bekleyip atılan iş (503)"),
+                             ("failed", "Hata ile biten iş")):
+        yield counter(f"search_executor_{field}_total", help_text,
+                      [({"pool": name}, st[field]) for name, st in pool_stats.items()])
+
+    batchers = {"text": text_batcher, "image": image_batcher}
+    yield gauge("search_batcher_queue_depth", "Encode batcher kuyruğu",
+                [({"batcher": name}, b.stats()["queue_depth"]) for name, b in batchers.items() if b is not None])
+    yield counter("search_cascade_total", "Kademeli arama yolu (lexical: encoder atlandı)",
+                  [({"path": path}, n) for path, n in cascade_counts().items()])
+
+    ready = search_ready.is_set()
+    yield gauge("search_ready", "İndeks ve modeller yüklendi", [({}, int(ready))])
+    if not ready:
+        return
+    index = get_index()
+    yield gauge("search_index_rows", "Kategori başına aranabilir ürün satırı",
+                [({"category": cat}, n) for cat, n in index.stats().items()])
+    delta = index.delta_stats()
+    yield gauge("search_index_delta_rows", "Delta segmentindeki satır", [({}, delta["delta_rows"])])
+    yield gauge("search_index_tombstones", "Ana indekste gizlenmiş satır", [({}, delta["tombstones"])])
+    yield gauge("search_index_resident_bytes", "Ana indeksin bellekte tutulan tarama yapıları (bayt)",
+                [({"kind": kind}, n) for kind, n in index.fused.memory_bytes().items()])
+    yield gauge("search_index_mapped_bytes", "Kuantize türlerin diskten eşlenen yeniden skorlama matrisleri (bayt)",
+                [({"kind": kind}, n) for kind, n in index.fused.mapped_bytes().items()])
+    yield gauge("search_model_bytes", "Bellekte yüklü model boyutu (bayt)",
+                [({"model": name}, info["bytes"]) for name, info in resident_models().items()])
+
+if (api_config.get("metrics", {}) or {}).get("enabled", True):
+    REGISTRY.register_collector(_collect_metrics)
+
+    @app.get("/metrics")
+    async def metrics():
+        """Prometheus metin biçiminde aşama histogramları ve durum metrikleri"""
+        return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
 
 # --- Run Server ---
 if __name__ == "__main__":
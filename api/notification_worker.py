@@ -16,6 +16,7 @@ sys.path.append(str(PROJECT_ROOT))
 
 # Config yükle
 from config.config_loader import get_config
+from tools.data_tool.catalog import get_catalog
 config = get_config()
 
 # --- Paths from config ---
@@ -76,38 +77,11 @@ def parse_price(val) -> float:
     return float(s)
 
 def load_product_from_shop(shop: str, product_id: str, category: Optional[str]) -> Optional[Dict[str, Any]]:
-    """Belirli mağazadan ürün bilgisini yükle"""
-    shop_data_path = config.get_shop_data_path(shop)
-    if not shop_data_path:
+    """Belirli mağazadan ürün bilgisini katalog indeksinden yükle"""
+    if not config.get_shop_data_path(shop):
         print(f"  ⚠️ Shop '{shop}' için data path bulunamadı")
         return None
-    
-    product_dir = shop_data_path / "product"
-    if not product_dir.exists():
-        print(f"  ⚠️ Product directory bulunamadı: {product_dir}")
-        return None
-    
-    # Kategori belirtilmişse o kategori dosyasına bak
-    if category:
-        category_config = config.get(f"categories.{category}")
-        if category_config and "product_file" in category_config:
-            files = [product_dir / category_config["product_file"].split("/")[-1]]
-        else:
-            files = [product_dir / f"{category}.json"]
-    else:
-        files = list(product_dir.glob("*.json"))
-    
-    for fp in files:
-        if not fp.exists():
-            continue
-        with suppress(Exception):
-            items = json.loads(fp.read_text(encoding="utf-8"))
-            for it in items:
-                if it.get("id") == product_id:
-                    it = dict(it)
-                    it["dukkan"] = shop
-                    return it
-    return None
+    return get_catalog().get(shop, product_id, category)
 
 def read_tracking() -> list:
     """Takip dosyasını oku"""
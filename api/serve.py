@@ -0,0 +1,142 @@
+# api/serve.py
+"""
+Üretim sunumu: katalog, indeks ve modeller ana süreçte bir kez yüklenir, ardından
+aynı dinleme soketini paylaşan N uvicorn worker'ı fork edilir. Model ağırlıkları ve
+indeks matrisleri fork öncesi yüklendiği için worker'lar bu sayfaları copy-on-write
+paylaşır; hot reload sonrası kurulan indeksler de search.shared_index ile mmap'ten paylaşılır.
+
+    python api/serve.py --workers 4
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import logging
+import traceback
+from pathlib import Path
+from typing import Dict, Optional
+
+import typer
+import uvicorn
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from config.config_loader import get_config
+
+logger = logging.getLogger("api.serve")
+
+app = typer.Typer()
+
+
+def _listen(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, slot: int, threads: int, log_level: str) -> None:
+    """Fork edilmiş süreçte: torch thread sayısını ayarla, aynı soket üzerinde uvicorn çalıştır."""
+    # OMP_NUM_THREADS: henüz import edilmemiş torch ve ONNX Runtime oturumları için
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    from api.main import app as fastapi_app
+
+    logger.info(f"Worker {slot} başladı (pid {os.getpid()}, {threads} thread)")
+    config = uvicorn.Config(fastapi_app, log_level=log_level.lower())
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(sock: socket.socket, slot: int, threads: int, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            _run_worker(sock, slot, threads, log_level)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+@app.command()
+def serve(
+    workers: Optional[int] = typer.Option(None, help="Worker sayısı (varsayılan: config api.serve.workers, 0 → CPU sayısı)"),
+    host: Optional[str] = typer.Option(None),
+    port: Optional[int] = typer.Option(None),
+):
+    config = get_config()
+    api_config = config.get_api_config()
+    serve_cfg = api_config.get("serve", {}) or {}
+    log_level = config.get("environment.LOG_LEVEL", "INFO")
+    logging.basicConfig(level=getattr(logging, log_level))
+
+    cpus = os.cpu_count() or 1
+    workers = int(workers if workers is not None else serve_cfg.get("workers", 0)) or cpus
+    threads = int(serve_cfg.get("threads_per_worker", 0)) or max(1, cpus // workers)
+    host = host or api_config.get("host", "0.0.0.0")
+    port = port or api_config.get("main_port", 8000)
+
+    # Fork öncesi yükleme: ana süreçte torch paralel bölgesi çalışmasın diye tek thread
+    # (OpenMP thread havuzu fork sonrası kullanılamaz; worker'lar kendi sayısını ayarlar)
+    load_models = api_config.get("preload_models", True)
+    if load_models:
+        import torch
+        torch.set_num_threads(1)
+
+    from tools.data_tool.search.warmup import warm_up
+    timings = warm_up(load_models=load_models)
+    logger.info(f"Ana süreç hazır: {timings}")
+
+    # API modülü de fork öncesi import edilir (worker'larda tekrar import maliyeti yok)
+    import api.main  # noqa: F401
+
+    sock = _listen(host, port, int(serve_cfg.get("backlog", 2048)))
+    logger.info(f"🚀 SocialScanAI API {host}:{port}, {workers} worker × {threads} thread")
+
+    children: Dict[int, int] = {}
+    for slot in range(workers):
+        children[_spawn(sock, slot, threads, log_level)] = slot
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    # Beklenmedik şekilde çıkan worker yeniden fork edilir (yüklü ana süreçten, yine paylaşımlı)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning(f"Worker {slot} (pid {pid}) çıktı (durum {status}); yeniden başlatılıyor")
+        time.sleep(1)
+        children[_spawn(sock, slot, threads, log_level)] = slot
+
+    sock.close()
+    logger.info("Tüm worker'lar durdu")
+
+
+if __name__ == "__main__":
+    app()
@@ -81,6 +81,10 @@ class ConfigLoader:
         """Model konfigürasyonlarını al"""
         return self.get("models", {})
     
+    def get_search_config(self) -> Dict[str, Any]:
+        """Arama (indeks, cache) konfigürasyonlarını al"""
+        return self.get("search", {}) or {}
+
     def get_api_config(self) -> Dict[str, Any]:
         """API konfigürasyonlarını al"""
         return self.get("api", {})
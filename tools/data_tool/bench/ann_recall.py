@@ -0,0 +1,124 @@
+# tools/data_tool/bench/ann_recall.py
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import typer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config_loader import get_config
+from tools.data_tool.search.ann import ann_config, category_partitions, partitioned_ann
+from tools.data_tool.search.vector_index import ALL_CATEGORIES, CategoryIndex, build_fused_index
+
+app = typer.Typer()
+
+
+def sample_queries(mat: np.ndarray, valid: np.ndarray, n: int, noise: float, rng) -> np.ndarray:
+    """Katalogdaki vektörlerin gürültülü kopyaları: gerçek sorgu dağılımına yakın."""
+    rows = rng.choice(np.flatnonzero(valid), size=n, replace=True)
+    q = mat[rows] + rng.normal(0, noise, size=(n, mat.shape[1])).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+@app.command()
+def main(
+    k: int = typer.Option(10, help="recall@k"),
+    n_queries: int = typer.Option(200, help="Kategori/tür başına sorgu sayısı"),
+    noise: float = typer.Option(0.05, help="Sorgu gürültüsü (std)"),
+    out: str = typer.Option("state/bench/ann_recall.jsonl", help="Sonuçların ekleneceği dosya"),
+):
+    """
+    Config'teki ANN ayarlarını API'nin kullandığı birleşik indekste (kategori maskesi + kategori
+    bölümü ANN'i) brute force'a karşı ölçer: recall@k, sorgu süresi ve tam taramaya düşme oranı.
+    """
+    cfg = get_config()
+    ann_cfg = ann_config()
+    min_rows = int(ann_cfg.get("min_rows", 5000))
+    rng = np.random.default_rng(0)
+    report = []
+
+    base = build_fused_index(cfg.get_category_names(), with_ann=False, with_quant=False)
+    ids, shops = list(base.ids), list(base.shops)
+    partitions = category_partitions(base.category, base.categories, base.codes)
+
+    for kind, params in (ann_cfg.get("kinds", {}) or {}).items():
+        mat, valid = base.matrices.get(kind), base.valid.get(kind)
+        if mat is None:
+            continue
+        params = params or {}
+        t = time.perf_counter()
+        ann = partitioned_ann(base.category, kind, mat, valid, partitions, ids, shops, params, min_rows,
+                              reuse=False)
+        build_s = time.perf_counter() - t
+        if ann is None:
+            print(f"{kind}: hiçbir kategori min_rows={min_rows} satıra ulaşmıyor, ANN kullanılmaz.")
+            continue
+        requested = params.get("type", "ivf")
+        built = sorted({sub.kind for sub in ann.parts.values()})
+        if built != [requested]:
+            # Örn. hnswlib kurulu değil → IVF kurulur; tablo kurulan türle etiketlenir
+            print(f"UYARI: {kind} için {requested} istendi, kurulan: {', '.join(built)}")
+
+        index = CategoryIndex(base.category, ids, shops, base.items, base.matrices, base.valid,
+                              ann={kind: ann}, rerank_factor=ann_cfg.get("rerank_factor", 4),
+                              categories=base.categories, codes=base.codes)
+
+        for category in base.categories + [ALL_CATEGORIES]:
+            mask = index.category_mask(category)
+            cat_valid = valid if mask is None else valid & mask
+            if int(cat_valid.sum()) < k:
+                continue
+            queries = sample_queries(mat, cat_valid, n_queries, noise, rng)
+            partition = None if category == ALL_CATEGORIES else category
+            if partition is None:
+                types = built + (["exact"] if ann.rest else [])
+            else:
+                types = [ann.parts[partition].kind if partition in ann.parts else "exact"]
+
+            hits, fallbacks, t_exact, t_ann = 0, 0, 0.0, 0.0
+            for q in queries:
+                t = time.perf_counter()
+                exact_rows, _ = index.top_k(kind, q, k, exact=True, mask=mask, kategori=category)
+                t_exact += time.perf_counter() - t
+                t = time.perf_counter()
+                ann_rows, _ = index.top_k(kind, q, k, mask=mask, kategori=category)
+                t_ann += time.perf_counter() - t
+                hits += len(set(exact_rows.tolist()) & set(ann_rows.tolist()))
+                # top_k'nın kullandığı aday kümesi top_n'in altındaysa tam taramaya düşülmüştür
+                cand = ann.candidates(q, k * index.rerank_factor, partition=partition)
+                fallbacks += len(np.unique(cand[cat_valid[cand]])) < k
+
+            row = {
+                "category": category,
+                "kind": kind,
+                "type": "+".join(types),
+                "requested_type": requested,
+                "ann_partitions": sorted(ann.parts),
+                "params": params,
+                "rows": int(cat_valid.sum()),
+                f"recall@{k}": round(hits / (k * n_queries), 4),
+                "fallback_rate": round(fallbacks / n_queries, 4),
+                "exact_ms": round(t_exact / n_queries * 1000, 4),
+                "ann_ms": round(t_ann / n_queries * 1000, 4),
+                "build_s": round(build_s, 3),
+            }
+            report.append(row)
+            print(f"{category}/{kind} [{row['type']}] recall@{k}={row[f'recall@{k}']} "
+                  f"fallback={row['fallback_rate']} exact={row['exact_ms']}ms ann={row['ann_ms']}ms "
+                  f"({row['rows']} satır)")
+
+    out_path = cfg.get_absolute_path(out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("a", encoding="utf-8") as f:
+        for row in report:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"Kaydedildi: {out_path}")
+
+
+if __name__ == "__main__":
+    app()
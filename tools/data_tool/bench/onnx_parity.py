@@ -0,0 +1,149 @@
+# tools/data_tool/bench/onnx_parity.py
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import typer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config_loader import get_config
+from tools.data_tool.catalog import get_catalog
+from tools.data_tool.model_registry import load_torch_model, model_name
+from tools.data_tool.onnx_backend import load_onnx_model
+
+app = typer.Typer()
+
+
+def sample_inputs(n: int):
+    """Katalogdan metin (ad + açıklama) ve görsel yolu örnekleri."""
+    from tools.data_tool.ops.embed_clip import resolve_image_path
+
+    cfg = get_config()
+    catalog = get_catalog()
+    texts, images = [], []
+    for shop in cfg.get_shops():
+        image_dir = cfg.get_shop_image_path(shop)
+        for category in cfg.get_category_names():
+            for item in catalog.records(shop, category):
+                texts.extend(t for t in (item.get("name"), item.get("description")) if t)
+                for rel in (item.get("images") or [])[:1]:
+                    path = resolve_image_path(image_dir, rel) if image_dir else None
+                    if path is not None and path.exists():
+                        images.append(path)
+    return texts[:n], images[:n]
+
+
+def _encoders(key: str, model):
+    """Kule adı → (girdi listesi → normalize float32 matris) fonksiyonları."""
+    import torch
+    from PIL import Image
+
+    def normalize(x):
+        x = np.asarray(x, dtype=np.float32)
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    if key == "text_st":
+        return {"st_text": lambda texts: normalize(model.encode(texts, normalize_embeddings=True,
+                                                                convert_to_numpy=True))}
+
+    def clip_text(texts):
+        with torch.no_grad():
+            return normalize(model.model.encode_text(model.tokenizer(texts)).float().cpu().numpy())
+
+    def clip_image(paths):
+        batch = torch.stack([model.preprocess(Image.open(p).convert("RGB")) for p in paths])
+        with torch.no_grad():
+            return normalize(model.model.encode_image(batch).float().cpu().numpy())
+
+    return {"clip_text": clip_text} if key == "text_clip" else {"clip_image": clip_image}
+
+
+def _latency_ms(fn, inputs, batch: int, repeats: int):
+    chunk = (inputs * ((batch // max(len(inputs), 1)) + 1))[:batch]
+    fn(chunk)  # ısınma
+    times = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn(chunk)
+        times.append((time.perf_counter() - t) * 1000)
+    return round(float(np.percentile(times, 50)), 2), round(float(np.percentile(times, 95)), 2)
+
+
+@app.command()
+def main(
+    keys: str = typer.Option("text_st,text_clip,clip", help="models anahtarları (virgülle)"),
+    n_samples: int = typer.Option(64, help="Parite için metin / görsel sayısı"),
+    min_cosine: float = typer.Option(0.99, help="onnx için PyTorch'a en düşük cosine"),
+    min_cosine_int8: float = typer.Option(0.95, help="onnx-int8 için PyTorch'a en düşük cosine"),
+    batches: str = typer.Option("1,8", help="Gecikme ölçülecek batch boyları"),
+    repeats: int = typer.Option(20, help="Batch başına tekrar"),
+    out: str = typer.Option("state/bench/onnx_parity.jsonl", help="Sonuçların ekleneceği dosya"),
+):
+    """
+    ONNX / ONNX-int8 kodlayıcılarını PyTorch'a karşı ölçer: vektör başına cosine (parite)
+    ve batch başına p50/p95 gecikme. Eşik altında kalan varsa çıkış kodu 1.
+    """
+    cfg = get_config()
+    texts, images = sample_inputs(n_samples)
+    batch_sizes = [int(b) for b in batches.split(",") if b.strip()]
+    thresholds = {"onnx": min_cosine, "onnx-int8": min_cosine_int8}
+    print(f"Örnekler: {len(texts)} metin, {len(images)} görsel")
+
+    report, failed = [], []
+    for key in [k.strip() for k in keys.split(",") if k.strip()]:
+        name = model_name(key)
+        reference = _encoders(key, load_torch_model(name))
+        variants = {backend: _encoders(key, load_onnx_model(name, quantized=backend == "onnx-int8"))
+                    for backend in thresholds}
+
+        for tower, ref_fn in reference.items():
+            inputs = images if tower == "clip_image" else texts
+            if not inputs:
+                print(f"{key}/{tower}: örnek yok, atlanıyor")
+                continue
+            ref = ref_fn(inputs)
+            ref_latency = {b: _latency_ms(ref_fn, inputs, b, repeats) for b in batch_sizes}
+
+            for backend, fns in variants.items():
+                got = fns[tower](inputs)
+                cos = (ref * got).sum(axis=1)
+                latency = {b: _latency_ms(fns[tower], inputs, b, repeats) for b in batch_sizes}
+                row = {
+                    "key": key,
+                    "model": name,
+                    "tower": tower,
+                    "backend": backend,
+                    "samples": len(inputs),
+                    "cosine_min": round(float(cos.min()), 5),
+                    "cosine_mean": round(float(cos.mean()), 5),
+                    "threshold": thresholds[backend],
+                    "passed": bool(cos.min() >= thresholds[backend]),
+                    "latency_ms": {str(b): {"torch_p50": ref_latency[b][0], "torch_p95": ref_latency[b][1],
+                                            "p50": latency[b][0], "p95": latency[b][1]} for b in batch_sizes},
+                }
+                report.append(row)
+                if not row["passed"]:
+                    failed.append(f"{key}/{tower}/{backend}")
+                speed = " ".join(f"b{b}: {ref_latency[b][0]}→{latency[b][0]}ms" for b in batch_sizes)
+                print(f"{key}/{tower} [{backend}] cos min={row['cosine_min']} mean={row['cosine_mean']} "
+                      f"{'OK' if row['passed'] else 'EŞİK ALTI'} | p50 torch→onnx {speed}")
+
+    out_path = cfg.get_absolute_path(out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("a", encoding="utf-8") as f:
+        for row in report:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"Kaydedildi: {out_path}")
+
+    if failed:
+        print(f"Parite eşiği altında: {', '.join(failed)}")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,102 @@
+# tools/data_tool/bench/quant_recall.py
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import typer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config_loader import get_config
+from tools.data_tool.bench.ann_recall import sample_queries
+from tools.data_tool.search.quantize import build_quantizer, quantization_config, rescore_matrices
+from tools.data_tool.search.vector_index import CategoryIndex, build_category_index
+
+app = typer.Typer()
+
+
+@app.command()
+def main(
+    k: int = typer.Option(10, help="recall@k"),
+    n_queries: int = typer.Option(200, help="Kategori/tür başına sorgu sayısı"),
+    noise: float = typer.Option(0.05, help="Sorgu gürültüsü (std)"),
+    qtype: str = typer.Option("", help="int8 | pq (boşsa config)"),
+    rerank_factor: int = typer.Option(0, help="Yeniden skorlanacak aday katsayısı (0 ise config)"),
+    out: str = typer.Option("state/bench/quant_recall.jsonl", help="Sonuçların ekleneceği dosya"),
+):
+    """
+    Kuantize kaba tarama + float yeniden skorlama: bellek kazancı, recall@k ve süre.
+    İndeks sunumdaki gibi kurulur (yeniden skorlama matrisi rescore_dtype + diskten eşli);
+    resident_bytes bellekte sürekli kalan toplamdır, compression float32 matrise oranıdır.
+    """
+    cfg = get_config()
+    params = dict(quantization_config())
+    if qtype:
+        params["type"] = qtype
+    factor = rerank_factor or int(params.get("rerank_factor", 8))
+    rng = np.random.default_rng(0)
+    report = []
+
+    for category in cfg.get_category_names():
+        base = build_category_index(category, with_ann=False, with_quant=False)
+        for kind in params.get("kinds", []) or []:
+            mat, valid = base.matrices.get(kind), base.valid.get(kind)
+            if mat is None or int(valid.sum()) < k:
+                continue
+            t = time.perf_counter()
+            quant = build_quantizer(mat, valid, params)
+            build_s = time.perf_counter() - t
+
+            matrices = {**base.matrices, **rescore_matrices(f"bench-{category}", {kind: mat})}
+            index = CategoryIndex(category, list(base.ids), list(base.shops), base.items,
+                                  matrices, base.valid, quant={kind: quant},
+                                  quant_rerank_factor=factor)
+            resident = index.memory_bytes()[kind]
+            mapped = index.mapped_bytes().get(kind, 0)
+            queries = sample_queries(mat, valid, n_queries, noise, rng)
+
+            hits, t_exact, t_quant = 0, 0.0, 0.0
+            for q in queries:
+                t = time.perf_counter()
+                exact_rows, _ = base.top_k(kind, q, k, exact=True)
+                t_exact += time.perf_counter() - t
+                t = time.perf_counter()
+                quant_rows, _ = index.top_k(kind, q, k)
+                t_quant += time.perf_counter() - t
+                hits += len(set(exact_rows.tolist()) & set(quant_rows.tolist()))
+
+            row = {
+                "category": category,
+                "kind": kind,
+                "type": quant.kind,
+                "rows": int(valid.sum()),
+                "float32_bytes": int(mat.nbytes),
+                "code_bytes": int(quant.nbytes),
+                "resident_bytes": int(resident),
+                "mapped_rescore_bytes": int(mapped),
+                "compression": round(mat.nbytes / max(resident, 1), 2),
+                f"recall@{k}": round(hits / (k * n_queries), 4),
+                "exact_ms": round(t_exact / n_queries * 1000, 4),
+                "quant_ms": round(t_quant / n_queries * 1000, 4),
+                "build_s": round(build_s, 3),
+            }
+            report.append(row)
+            print(f"{category}/{kind} [{quant.kind}] {row['float32_bytes'] / 1e6:.2f}MB → "
+                  f"{row['resident_bytes'] / 1e6:.2f}MB bellekte ({row['compression']}x, "
+                  f"+{row['mapped_rescore_bytes'] / 1e6:.2f}MB diskten eşli) "
+                  f"recall@{k}={row[f'recall@{k}']} exact={row['exact_ms']}ms quant={row['quant_ms']}ms")
+
+    out_path = cfg.get_absolute_path(out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("a", encoding="utf-8") as f:
+        for row in report:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print(f"Kaydedildi: {out_path}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,78 @@
+# tools/data_tool/bench/startup_bench.py
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import typer
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config_loader import get_config
+
+app = typer.Typer()
+
+# Her ölçüm temiz bir yorumlayıcıda: modül cache'i ve import'lar sıfırdan
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import api.main
+t_import = time.perf_counter() - t0
+heavy = sorted(m for m in ("torch", "open_clip", "sentence_transformers", "matplotlib") if m in sys.modules)
+from tools.data_tool.search.warmup import warm_up
+timings = warm_up(load_models={load_models})
+t_ready = time.perf_counter() - t0
+print(json.dumps({{"import_s": round(t_import, 3), "ready_s": round(t_ready, 3),
+                  "heavy_modules_at_import": heavy, "stages": timings}}))
+"""
+
+
+def _run_once(load_models: bool) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(load_models=load_models)],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip())
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+@app.command()
+def main(
+    runs: int = typer.Option(3, help="Ölçüm tekrar sayısı"),
+    load_models: bool = typer.Option(True, help="Warm-up modelleri de yüklesin mi"),
+    out: str = typer.Option("state/bench/startup.jsonl", help="Sonuçların ekleneceği dosya"),
+):
+    """api.main import süresini ve hazır olma süresini (time-to-ready) ölçer."""
+    results = []
+    for i in range(runs):
+        r = _run_once(load_models)
+        results.append(r)
+        print(f"#{i + 1}: import={r['import_s']}s ready={r['ready_s']}s heavy@import={r['heavy_modules_at_import']}")
+
+    summary = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": runs,
+        "load_models": load_models,
+        "import_s_median": statistics.median(r["import_s"] for r in results),
+        "ready_s_median": statistics.median(r["ready_s"] for r in results),
+        "last_stages": results[-1]["stages"],
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+    out_path = get_config().get_absolute_path(out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    print(f"Kaydedildi: {out_path}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,181 @@
+# tools/data_tool/catalog.py
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.config_loader import get_config
+from tools.data_tool.vector_store import VECTOR_KINDS
+
+logger = logging.getLogger(__name__)
+
+
+class _Shard:
+    """Tek bir dükkan/kategori dosyasının bellekteki (vektörsüz) kayıtları."""
+
+    def __init__(self, path: Path, signature: Tuple[int, int], records: List[dict]):
+        self.path = path
+        self.signature = signature
+        self.records = records
+
+
+class Catalog:
+    """
+    product_id → (dükkan, kategori, satır) eşlemesi ve güncel ürün kayıtları.
+    Dosyalar sadece değiştiğinde (mtime/size) yeniden okunur; arama sırasında
+    ürün bulmak için dosya açılmaz.
+    """
+
+    def __init__(self, refresh_interval: float = 2.0):
+        self._cfg = get_config()
+        self.refresh_interval = refresh_interval
+        # (shards, by_id) tek referans olarak değiştirilir; okuyucular tutarlı bir görüntü alır
+        self._state: Tuple[Dict[Tuple[str, str], _Shard], Dict[str, List[Tuple[str, str, int]]]] = ({}, {})
+        self._last_check = 0.0
+        self._version = ""
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def _product_file(self, shop: str, category: str) -> Optional[Path]:
+        data_dir = self._cfg.get_shop_data_path(shop)
+        if not data_dir:
+            return None
+        cat_info = self._cfg.get_category(category)
+        return data_dir / cat_info.get("product_file", f"product/{category}.json")
+
+    @staticmethod
+    def _read_records(path: Path, shop: str, category: str) -> List[dict]:
+        items = json.loads(path.read_text(encoding="utf-8"))
+        records = []
+        for it in items:
+            rec = {k: v for k, v in it.items() if k not in VECTOR_KINDS}
+            rec["dukkan"] = shop
+            rec["kategori"] = category
+            records.append(rec)
+        return records
+
+    def refresh(self, force: bool = False) -> bool:
+        """Değişen dosyaları yeniden okur; bir değişiklik olduysa True döner."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.refresh_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            shards = dict(self._state[0])
+            changed = False
+
+            for shop in self._cfg.get_shops():
+                for category in self._cfg.get_category_names():
+                    key = (shop, category)
+                    path = self._product_file(shop, category)
+                    try:
+                        st = path.stat() if path else None
+                    except OSError:
+                        st = None
+                    if st is None:
+                        if shards.pop(key, None) is not None:
+                            changed = True
+                        continue
+
+                    signature = (st.st_mtime_ns, st.st_size)
+                    old = shards.get(key)
+                    if old is not None and old.signature == signature:
+                        continue
+                    try:
+                        shards[key] = _Shard(path, signature, self._read_records(path, shop, category))
+                        changed = True
+                    except (OSError, ValueError) as e:
+                        # Yarım yazılmış dosya vb. → eski kayıtlarla devam
+                        logger.warning(f"Katalog okunamadı {path}: {e}")
+
+            if changed:
+                by_id: Dict[str, List[Tuple[str, str, int]]] = {}
+                for (shop, category), shard in shards.items():
+                    for row, rec in enumerate(shard.records):
+                        pid = rec.get("id")
+                        if pid:
+                            by_id.setdefault(pid, []).append((shop, category, row))
+                self._state = (shards, by_id)
+                self._version = self._signature_token(shards)
+            return changed
+
+    @staticmethod
+    def _signature_token(shards: Dict[Tuple[str, str], _Shard]) -> str:
+        h = hashlib.sha1()
+        for key in sorted(shards):
+            mtime_ns, size = shards[key].signature
+            h.update(f"{key[0]}/{key[1]}:{mtime_ns}:{size};".encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def version(self) -> str:
+        """
+        Ürün dosyalarının (mtime, size) imzalarından türetilen katalog sürümü.
+        calc_metrics / embed op'ları bir dosyayı yeniden yazınca değişir.
+        """
+        self.refresh()
+        return self._version
+
+    def _snapshot(self):
+        self.refresh()
+        return self._state
+
+    def records(self, shop: str, category: str) -> List[dict]:
+        """Dükkan/kategori kayıtları (paylaşılan liste; değiştirmeyin)."""
+        shards, _ = self._snapshot()
+        shard = shards.get((shop, category))
+        return shard.records if shard else []
+
+    def locate(self, product_id: str, category: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """product_id'nin bulunduğu (dükkan, kategori, satır) konumları."""
+        _, by_id = self._snapshot()
+        locs = by_id.get(product_id, [])
+        if category:
+            locs = [loc for loc in locs if loc[1] == category]
+        return locs
+
+    def get(self, shop: str, product_id: str, category: Optional[str] = None) -> Optional[dict]:
+        """Belirli mağazadaki güncel ürün kaydı (kopya) veya None."""
+        shards, by_id = self._snapshot()
+        for loc_shop, loc_cat, row in by_id.get(product_id, []):
+            if loc_shop == shop and (not category or loc_cat == category):
+                return dict(shards[(loc_shop, loc_cat)].records[row])
+        return None
+
+    def variants(self, product_id: str, category: Optional[str] = None) -> List[dict]:
+        """Aynı ürünün tüm mağazalardaki güncel kayıtları, dükkan sırasıyla."""
+        shards, by_id = self._snapshot()
+        return [
+            dict(shards[(shop, cat)].records[row])
+            for shop, cat, row in by_id.get(product_id, [])
+            if not category or cat == category
+        ]
+
+
+_catalog: Optional[Catalog] = None
+_catalog_lock = threading.Lock()
+
+
+def catalog_version() -> str:
+    """
+    Yüklü kataloğun son yenilemedeki sürümü ("" henüz yüklenmediyse). Dosyalara bakmaz ve
+    kataloğu kurmaya zorlamaz (event loop'tan çağrılabilir); yenileme indeks izleyicisinin
+    (reload_index / update_index) ve arama işlerinin thread'lerinde olur.
+    """
+    current = _catalog
+    return current._version if current is not None else ""
+
+
+def get_catalog() -> Catalog:
+    """Global katalog; ilk çağrıda tüm ürün dosyaları bir kez okunur."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                interval = get_config().get("catalog.refresh_interval", 2.0)
+                _catalog = Catalog(refresh_interval=float(interval))
+    return _catalog
@@ -0,0 +1,157 @@
+# tools/data_tool/model_registry.py
+
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config.config_loader import get_config
+
+logger = logging.getLogger(__name__)
+
+# config.yaml → models.<key>.model_name yoksa kullanılacak varsayılanlar
+DEFAULT_MODEL_NAMES = {
+    "clip": "open_clip:ViT-B-32/laion2b_s34b_b79k",
+    "text_clip": "open_clip:ViT-B-32/laion2b_s34b_b79k",
+    "text_st": "sentence-transformers:all-MiniLM-L6-v2",
+}
+
+
+class ClipBundle:
+    """open_clip modeli + görsel ön işleme + tokenizer (aynı ağırlıklar)."""
+
+    def __init__(self, model, preprocess, tokenizer):
+        self.model = model
+        self.preprocess = preprocess
+        self.tokenizer = tokenizer
+
+
+def parse_openclip_name(s: str) -> Tuple[str, str]:
+    """
+    'open_clip:ViT-B-32/laion2b_s34b_b79k' -> ('ViT-B-32', 'laion2b_s34b_b79k')
+    Farklı format gelirse güvenli fallback uygular.
+    """
+    try:
+        if ":" in s:
+            _, rest = s.split(":", 1)
+        else:
+            rest = s
+        arch, pretrained = rest.split("/", 1)
+        return arch.strip(), pretrained.strip()
+    except Exception:
+        return "ViT-B-32", "laion2b_s34b_b79k"
+
+
+_models: Dict[str, Any] = {}
+_load_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+_device: Optional[str] = None
+
+
+def get_device() -> str:
+    global _device
+    if _device is None:
+        import torch
+        _device = "cuda" if torch.cuda.is_available() else "cpu"
+    return _device
+
+
+def model_name(key: str) -> str:
+    """Config'teki model adı (aynı ada sahip anahtarlar aynı örneği paylaşır)."""
+    cfg = (get_config().get_models() or {}).get(key, {}) or {}
+    return cfg.get("model_name") or DEFAULT_MODEL_NAMES.get(key, key)
+
+
+def model_backend(key: str) -> str:
+    """Çıkarım backend'i: torch (eager) | onnx | onnx-int8 (models.<key>.backend)."""
+    cfg = (get_config().get_models() or {}).get(key, {}) or {}
+    backend = str(cfg.get("backend") or "torch").lower()
+    if backend not in ("torch", "onnx", "onnx-int8"):
+        raise ValueError(f"Desteklenmeyen backend: {key} → {backend}")
+    return backend
+
+
+def model_id(key: str) -> str:
+    """Model örneği / embedding cache kimliği: model adı + (torch değilse) backend."""
+    backend = model_backend(key)
+    return model_name(key) if backend == "torch" else f"{model_name(key)}|{backend}"
+
+
+def load_torch_model(name: str):
+    """Model adından PyTorch (eager) modelini yükler; ONNX dışa aktarımı da bunu kullanır."""
+    backend = name.split(":", 1)[0] if ":" in name else ""
+    device = get_device()
+
+    if backend == "open_clip":
+        import open_clip
+        arch, pretrained = parse_openclip_name(name)
+        model, _, preprocess = open_clip.create_model_and_transforms(arch, pretrained=pretrained)
+        model = model.to(device).eval()
+        return ClipBundle(model, preprocess, open_clip.get_tokenizer(arch))
+
+    if backend == "sentence-transformers":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name.split(":", 1)[1], device=device)
+
+    raise ValueError(f"Desteklenmeyen model: {name}")
+
+
+def _load(name: str, backend: str):
+    if backend == "torch":
+        return load_torch_model(name)
+    from tools.data_tool.onnx_backend import load_onnx_model
+    return load_onnx_model(name, quantized=backend == "onnx-int8")
+
+
+def get_model(key: str):
+    """
+    models.<key> için modeli döndürür; her farklı model süreç başına
+    ilk kullanımda bir kez yüklenir ve tüm arama/embed fonksiyonlarınca paylaşılır.
+    """
+    mid = model_id(key)
+    model = _models.get(mid)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        lock = _load_locks.setdefault(mid, threading.Lock())
+    with lock:
+        model = _models.get(mid)
+        if model is None:
+            logger.info(f"Model yükleniyor: {mid} ({key})")
+            model = _load(model_name(key), model_backend(key))
+            _models[mid] = model
+    return model
+
+
+def get_clip(key: str = "clip") -> ClipBundle:
+    return get_model(key)
+
+
+def get_sentence_model(key: str = "text_st"):
+    return get_model(key)
+
+
+def _module_bytes(module) -> int:
+    total = 0
+    for t in list(module.parameters()) + list(module.buffers()):
+        total += t.numel() * t.element_size()
+    return total
+
+
+def resident_models() -> Dict[str, Dict[str, Any]]:
+    """Bellekte yüklü modeller: {model kimliği: {keys, bytes}}"""
+    keys_by_name: Dict[str, list] = {}
+    for key in (get_config().get_models() or {}):
+        keys_by_name.setdefault(model_id(key), []).append(key)
+
+    out = {}
+    for name, model in list(_models.items()):
+        module = model.model if isinstance(model, ClipBundle) else model
+        # ONNX oturumları parametre listesi tutmaz; model dosyalarının boyutu raporlanır
+        nbytes = module.nbytes if hasattr(module, "nbytes") else _module_bytes(module)
+        out[name] = {"keys": keys_by_name.get(name, []), "bytes": nbytes}
+    return out
+
+
+def resident_memory_bytes() -> int:
+    return sum(info["bytes"] for info in resident_models().values())
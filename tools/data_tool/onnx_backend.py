@@ -0,0 +1,280 @@
+# tools/data_tool/onnx_backend.py
+
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.config_loader import get_config
+from tools.data_tool.model_registry import ClipBundle, load_torch_model, parse_openclip_name
+
+logger = logging.getLogger(__name__)
+
+# Dışa aktarılan graflar: state/onnx/<model adı>/{text,image}.onnx (+ .int8.onnx) + meta.json
+ONNX_DIR = "state/onnx"
+OPSET = 17
+META_NAME = "meta.json"
+
+
+def onnx_dir(name: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name)
+    return get_config().get_absolute_path(ONNX_DIR) / slug
+
+
+def _read_meta(out_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((out_dir / META_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def tower_file(out_dir: Path, tower: str, quantized: bool) -> Path:
+    return out_dir / (f"{tower}.int8.onnx" if quantized else f"{tower}.onnx")
+
+
+def _torch_export(module, args: tuple, path: Path, input_names: List[str], dynamic_axes: Dict[str, Dict[int, str]]):
+    import torch
+
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False  # dynamic_axes ile klasik (TorchScript) dışa aktarıcı
+    with torch.no_grad():
+        torch.onnx.export(
+            module, args, str(path),
+            input_names=input_names, output_names=["embeddings"],
+            dynamic_axes={**dynamic_axes, "embeddings": {0: "batch"}},
+            opset_version=OPSET, do_constant_folding=True, **kwargs,
+        )
+
+
+def _towers():
+    """Dışa aktarılan kuleler: normalize vektör döndüren ince torch sarmalayıcıları."""
+    import torch
+
+    class ClipText(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids):
+            x = self.model.encode_text(input_ids).float()
+            return x / x.norm(dim=-1, keepdim=True)
+
+    class ClipImage(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, pixel_values):
+            x = self.model.encode_image(pixel_values).float()
+            return x / x.norm(dim=-1, keepdim=True)
+
+    class MeanPooled(torch.nn.Module):
+        """sentence-transformers Transformer + mean pooling + normalize (MiniLM hattı)."""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            hidden = self.model(input_ids=input_ids, attention_mask=attention_mask)[0]
+            mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+            x = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            return x / x.norm(dim=-1, keepdim=True)
+
+    return ClipText, ClipImage, MeanPooled
+
+
+def export_model(name: str) -> Dict[str, Any]:
+    """Model adındaki kuleleri ONNX'e aktarır (CPU, dinamik batch) ve meta.json yazar."""
+    out_dir = onnx_dir(name)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    backend = name.split(":", 1)[0]
+    ClipText, ClipImage, MeanPooled = _towers()
+    model = load_torch_model(name)
+    meta: Dict[str, Any] = {"name": name, "backend": backend, "opset": OPSET, "towers": [], "quantized": []}
+
+    if backend == "open_clip":
+        import torch
+
+        clip = model.model.cpu().eval()
+        tokens = model.tokenizer(["a photo of a product"])
+        _torch_export(ClipText(clip), (tokens,), tower_file(out_dir, "text", False),
+                      ["input_ids"], {"input_ids": {0: "batch"}})
+
+        pp = dict(getattr(clip.visual, "preprocess_cfg", None) or {})
+        size = pp.get("size") or clip.visual.image_size
+        size = size if isinstance(size, (list, tuple)) else (size, size)
+        _torch_export(ClipImage(clip), (torch.zeros(1, 3, *size),), tower_file(out_dir, "image", False),
+                      ["pixel_values"], {"pixel_values": {0: "batch"}})
+        meta["towers"] = ["text", "image"]
+        meta["preprocess"] = {
+            "size": list(size),
+            "mean": list(pp.get("mean") or getattr(clip.visual, "image_mean", None) or (0.48145466, 0.4578275, 0.40821073)),
+            "std": list(pp.get("std") or getattr(clip.visual, "image_std", None) or (0.26862954, 0.26130258, 0.27577711)),
+            "interpolation": pp.get("interpolation"),
+            "resize_mode": pp.get("resize_mode"),
+        }
+        with torch.no_grad():
+            meta["dim"] = int(clip.encode_text(tokens).shape[-1])
+
+    elif backend == "sentence-transformers":
+        st = model.cpu()
+        if not getattr(st[1], "pooling_mode_mean_tokens", True):
+            logger.warning(f"{name}: pooling mean değil; ONNX grafı mean pooling kullanır")
+        tokenizer = st.tokenizer
+        tokenizer.save_pretrained(str(out_dir / "tokenizer"))
+        enc = tokenizer(["a photo of a product"], return_tensors="pt", padding=True)
+        axes = {0: "batch", 1: "seq"}
+        _torch_export(MeanPooled(st[0].auto_model.eval()), (enc["input_ids"], enc["attention_mask"]),
+                      tower_file(out_dir, "text", False), ["input_ids", "attention_mask"],
+                      {"input_ids": axes, "attention_mask": axes})
+        meta["towers"] = ["text"]
+        meta["max_seq_length"] = int(st.max_seq_length)
+        meta["dim"] = int(st.get_sentence_embedding_dimension())
+
+    else:
+        raise ValueError(f"ONNX dışa aktarımı desteklenmiyor: {name}")
+
+    (out_dir / META_NAME).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info(f"ONNX dışa aktarıldı: {name} → {out_dir} ({meta['towers']})")
+    return meta
+
+
+def quantize_model(name: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Dışa aktarılmış kuleler için int8 dinamik kuantizasyon (ağırlıklar int8, aktivasyonlar çalışma anında)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_dir = onnx_dir(name)
+    for tower in meta["towers"]:
+        # Sadece MatMul: CPU EP'de ConvInteger desteği sınırlı, görsel kulenin patch conv'u float kalır
+        quantize_dynamic(str(tower_file(out_dir, tower, False)), str(tower_file(out_dir, tower, True)),
+                         weight_type=QuantType.QInt8, op_types_to_quantize=["MatMul"])
+    meta["quantized"] = list(meta["towers"])
+    (out_dir / META_NAME).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info(f"ONNX int8: {name} → {meta['towers']}")
+    return meta
+
+
+def _session(path: Path):
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Çok worker'lı sunumda api/serve.py worker başına thread sayısını OMP_NUM_THREADS ile verir
+    threads = int(os.environ.get("OMP_NUM_THREADS") or 0)
+    if threads:
+        opts.intra_op_num_threads = threads
+    return ort.InferenceSession(str(path), sess_options=opts, providers=["CPUExecutionProvider"])
+
+
+class OnnxClipModel:
+    """
+    open_clip modelinin encode_text / encode_image arayüzü, ONNX Runtime ile.
+    Çağıranlar torch tensörü verip torch tensörü aldığı için arama ve embed kodu değişmez.
+    Kule oturumları ilk kullanımda açılır (text_clip sadece metin, clip sadece görsel kulesini yükler).
+    """
+
+    def __init__(self, out_dir: Path, quantized: bool = False):
+        self.out_dir = out_dir
+        self.quantized = quantized
+        self._sessions: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _run(self, tower: str, name: str, value: np.ndarray):
+        session = self._sessions.get(tower)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(tower)
+                if session is None:
+                    session = _session(tower_file(self.out_dir, tower, self.quantized))
+                    self._sessions[tower] = session
+        return session.run(None, {name: value})[0]
+
+    @staticmethod
+    def _numpy(x) -> np.ndarray:
+        return x.detach().cpu().numpy() if hasattr(x, "detach") else np.asarray(x)
+
+    def encode_text(self, tokens):
+        import torch
+        return torch.from_numpy(self._run("text", "input_ids", self._numpy(tokens).astype(np.int64)))
+
+    def encode_image(self, pixels):
+        import torch
+        return torch.from_numpy(self._run("image", "pixel_values", self._numpy(pixels).astype(np.float32)))
+
+    def eval(self):
+        return self
+
+    @property
+    def nbytes(self) -> int:
+        return sum(tower_file(self.out_dir, tower, self.quantized).stat().st_size for tower in self._sessions)
+
+
+class OnnxSentenceEncoder:
+    """SentenceTransformer.encode arayüzü (normalize vektörler), ONNX Runtime ile."""
+
+    def __init__(self, out_dir: Path, meta: Dict[str, Any], quantized: bool = False):
+        from transformers import AutoTokenizer
+
+        self.path = tower_file(out_dir, "text", quantized)
+        self.session = _session(self.path)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(out_dir / "tokenizer"))
+        self.max_seq_length = int(meta.get("max_seq_length", 256))
+        self.dim = int(meta.get("dim", 0))
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = True,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        out = []
+        for start in range(0, len(sentences), batch_size):
+            enc = self.tokenizer(sentences[start:start + batch_size], padding=True, truncation=True,
+                                 max_length=self.max_seq_length, return_tensors="np")
+            out.append(self.session.run(None, {
+                "input_ids": enc["input_ids"].astype(np.int64),
+                "attention_mask": enc["attention_mask"].astype(np.int64),
+            })[0])
+        vecs = np.concatenate(out).astype(np.float32) if out else np.zeros((0, self.dim), dtype=np.float32)
+        return vecs[0] if single else vecs
+
+    @property
+    def nbytes(self) -> int:
+        return self.path.stat().st_size
+
+
+def _clip_preprocess(meta: Dict[str, Any]):
+    """Dışa aktarımda kaydedilen ön işleme ayarlarıyla open_clip dönüşümü (ağırlık yüklemeden)."""
+    import open_clip
+
+    pp = meta["preprocess"]
+    kwargs = {k: pp[k] for k in ("interpolation", "resize_mode") if pp.get(k)}
+    return open_clip.image_transform(tuple(pp["size"]), is_train=False, mean=tuple(pp["mean"]),
+                                     std=tuple(pp["std"]), **kwargs)
+
+
+def load_onnx_model(name: str, quantized: bool = False):
+    """
+    models.<key>.backend = onnx | onnx-int8 için modeli yükler.
+    Graf yoksa (ya da eski bir export ise) bir kez PyTorch'tan dışa aktarılır; int8 istenip yoksa kuantize edilir.
+    """
+    out_dir = onnx_dir(name)
+    meta = _read_meta(out_dir)
+    if meta is None or meta.get("name") != name or meta.get("opset") != OPSET:
+        logger.warning(f"ONNX grafı yok, dışa aktarılıyor: {name}")
+        meta = export_model(name)
+    if quantized and set(meta.get("quantized", [])) != set(meta["towers"]):
+        meta = quantize_model(name, meta)
+
+    if meta["backend"] == "open_clip":
+        import open_clip
+
+        arch, _ = parse_openclip_name(name)
+        return ClipBundle(OnnxClipModel(out_dir, quantized), _clip_preprocess(meta), open_clip.get_tokenizer(arch))
+    return OnnxSentenceEncoder(out_dir, meta, quantized)
@@ -0,0 +1,41 @@
+# tools/data_tool/ops/build_ann.py
+
+from config.config_loader import get_config
+from tools.data_tool.search.ann import ann_config, category_partitions, partitioned_ann
+from tools.data_tool.search.vector_index import build_fused_index
+
+
+def main():
+    cfg = get_config()
+    ann_cfg = ann_config()
+    if not ann_cfg.get("enabled", False):
+        print("ANN kapalı (search.ann.enabled=false), atlanıyor.")
+        return
+
+    kinds = ann_cfg.get("kinds", {}) or {}
+    min_rows = int(ann_cfg.get("min_rows", 5000))
+
+    # Arama tek birleşik indeks kullanır; ANN onun her kategori bölümü için ayrı kurulur
+    index = build_fused_index(cfg.get_category_names(), with_ann=False, with_quant=False)
+    category = index.category
+    ids, shops = list(index.ids), list(index.shops)
+    partitions = category_partitions(category, index.categories, index.codes)
+    print(f"\nİndeks: {category} ({len(index)} ürün, {len(index.categories)} kategori)")
+
+    for kind, params in kinds.items():
+        mat = index.matrices.get(kind)
+        if mat is None:
+            continue
+        ann = partitioned_ann(category, kind, mat, index.valid[kind], partitions, ids, shops,
+                              params or {}, min_rows, reuse=False, save=True)
+        if ann is None:
+            print(f"  {kind}: hiçbir kategori min_rows={min_rows} satıra ulaşmıyor, brute force yeterli.")
+            continue
+        for part, sub in ann.parts.items():
+            print(f"  {kind}/{part}: {sub.kind} kaydedildi")
+        for part, rows in ann.rest.items():
+            print(f"  {kind}/{part}: {len(rows)} satır < min_rows={min_rows}, brute force.")
+
+
+if __name__ == "__main__":
+    main()
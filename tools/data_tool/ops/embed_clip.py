@@ -5,40 +5,15 @@ import numpy as np
 import torch
 from PIL import Image
 from pathlib import Path
-import open_clip
 
 from config.config_loader import get_config
+from tools.data_tool.model_registry import get_clip, get_device
+from tools.data_tool.vector_store import attach_vectors, save_products, sync_vectors
 
 
-#  Model yükle (config'ten) 
-def _parse_openclip_name(s: str):
-    """
-    config.models.clip.model_name = 'open_clip:ViT-B-32/laion2b_s34b_b79k'
-    -> ('ViT-B-32', 'laion2b_s34b_b79k')
-    Farklı format gelirse güvenli fallback uygular.
-    """
-    try:
-        if ":" in s:
-            _, rest = s.split(":", 1)
-        else:
-            rest = s
-        arch, pretrained = rest.split("/", 1)
-        return arch.strip(), pretrained.strip()
-    except Exception:
-        # Güvenli varsayılan
-        return "ViT-B-32", "laion2b_s34b_b79k"
-
-
+# Model: models.clip (model_registry ile, süreç başına bir kez yüklenir)
 cfg = get_config()
-models_cfg = cfg.get_models() or {}
-clip_cfg = models_cfg.get("clip", {}) or {}
-clip_model_name = clip_cfg.get("model_name", "open_clip:ViT-B-32/laion2b_s34b_b79k")
-
-arch, pretrained = _parse_openclip_name(clip_model_name)
-
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model, _, preprocess = open_clip.create_model_and_transforms(arch, pretrained=pretrained)
-model = model.to(device).eval()
+device = get_device()
 
 
 def resolve_image_path(base_dir: Path, rel_path: str) -> Path:
@@ -68,10 +43,11 @@ def get_clip_vector(image_path: Path):
         return None, f"Görsel bulunamadı: {image_path}"
 
     try:
+        clip = get_clip("clip")
         image = Image.open(str(image_path)).convert("RGB")
-        image = preprocess(image).unsqueeze(0).to(device)
+        image = clip.preprocess(image).unsqueeze(0).to(device)
         with torch.no_grad():
-            feats = model.encode_image(image).cpu().numpy()
+            feats = clip.model.encode_image(image).cpu().numpy()
             norm = np.linalg.norm(feats)
             if norm == 0.0:
                 return None, f"Sıfır norm vektör: {image_path}"
@@ -102,6 +78,7 @@ def generate_clip_vectors():
 
             with product_file.open("r", encoding="utf-8") as f:
                 products = json.load(f)
+            attach_vectors(data_dir, cat_key, products)
 
             updated = False
 
@@ -133,10 +110,11 @@ def generate_clip_vectors():
                     updated = True
 
             if updated:
-                with product_file.open("w", encoding="utf-8") as f:
-                    json.dump(products, f, ensure_ascii=False, indent=2)
+                save_products(product_file, data_dir, cat_key, products)
                 print(f"{cat_key}.json güncellendi.")
             else:
+                if sync_vectors(data_dir, cat_key, products):
+                    print(f"{cat_key} vektör dosyaları yazıldı.")
                 print(f"{cat_key}.json zaten güncel.")
 
 
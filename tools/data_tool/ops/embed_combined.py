@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import List, Dict, Any
 
 from config.config_loader import get_config
+from tools.data_tool.vector_store import attach_vectors, save_products, sync_vectors
 
 
 def combine_vectors(vec1: List[float], vec2: List[float], weight1: float = 0.6, weight2: float = 0.4) -> List[float]:
@@ -18,8 +19,8 @@ def combine_vectors(vec1: List[float], vec2: List[float], weight1: float = 0.6,
     if not vec1 or not vec2:
         return []
 
-    v1 = np.array(vec1, dtype=float)
-    v2 = np.array(vec2, dtype=float)
+    v1 = np.asarray(vec1, dtype=np.float32)
+    v2 = np.asarray(vec2, dtype=np.float32)
 
     if len(v1) != len(v2):
         print(f"Boyut uyumsuzluğu: v1={len(v1)}, v2={len(v2)}")
@@ -64,6 +65,7 @@ def main():
 
             with product_path.open("r", encoding="utf-8") as f:
                 products: list[Dict[str, Any]] = json.load(f)
+            attach_vectors(data_dir, category, products)
 
             updated = False
             processed_count = 0
@@ -90,10 +92,11 @@ def main():
                     updated = True
 
             if updated:
-                with product_path.open("w", encoding="utf-8") as f:
-                    json.dump(products, f, indent=2, ensure_ascii=False)
+                save_products(product_path, data_dir, category, products)
                 print(f"{category}.json güncellendi. İşlenen: {processed_count}, Hatalı: {error_count}")
             else:
+                if sync_vectors(data_dir, category, products):
+                    print(f"{category} vektör dosyaları yazıldı.")
                 print(f"{category}.json zaten güncel.")
 
 
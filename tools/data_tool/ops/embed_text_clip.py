@@ -3,41 +3,16 @@
 import json
 import torch
 import numpy as np
-import open_clip
 from pathlib import Path
 
 from config.config_loader import get_config
+from tools.data_tool.model_registry import get_clip, get_device
+from tools.data_tool.vector_store import attach_vectors, save_products, sync_vectors
 
 
-def _parse_openclip_name(s: str):
-    """
-    models.text_clip.model_name = 'open_clip:ViT-B-32/laion2b_s34b_b79k'
-    -> ('ViT-B-32', 'laion2b_s34b_b79k')
-    Farklı format gelirse güvenli fallback uygular.
-    """
-    try:
-        if ":" in s:
-            _, rest = s.split(":", 1)
-        else:
-            rest = s
-        arch, pretrained = rest.split("/", 1)
-        return arch.strip(), pretrained.strip()
-    except Exception:
-        return "ViT-B-32", "laion2b_s34b_b79k"
-
-
+# Model: models.text_clip (model_registry ile, süreç başına bir kez yüklenir)
 cfg = get_config()
-models_cfg = cfg.get_models() or {}
-text_clip_cfg = models_cfg.get("text_clip", {}) or {}
-model_name = text_clip_cfg.get("model_name", "open_clip:ViT-B-32/laion2b_s34b_b79k")
-
-arch, pretrained = _parse_openclip_name(model_name)
-
-#  Model 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-model, _, _preprocess = open_clip.create_model_and_transforms(arch, pretrained=pretrained)
-tokenizer = open_clip.get_tokenizer(arch)
-model = model.to(device).eval()
+device = get_device()
 
 
 def get_text_clip_vector(desc, tags):
@@ -46,9 +21,10 @@ def get_text_clip_vector(desc, tags):
     if not text:
         return []
     try:
-        tokenized = tokenizer([text]).to(device)
+        clip = get_clip("text_clip")
+        tokenized = clip.tokenizer([text]).to(device)
         with torch.no_grad():
-            vec = model.encode_text(tokenized).cpu().numpy()
+            vec = clip.model.encode_text(tokenized).cpu().numpy()
             norm = np.linalg.norm(vec)
             if norm == 0.0:
                 return []
@@ -78,6 +54,7 @@ def main():
 
             with product_path.open("r", encoding="utf-8") as f:
                 products = json.load(f)
+            attach_vectors(data_dir, cat_key, products)
 
             updated = False
             for item in products:
@@ -93,10 +70,11 @@ def main():
                     updated = True
 
             if updated:
-                with product_path.open("w", encoding="utf-8") as f:
-                    json.dump(products, f, indent=2, ensure_ascii=False)
+                save_products(product_path, data_dir, cat_key, products)
                 print(f"{cat_key}.json güncellendi.")
             else:
+                if sync_vectors(data_dir, cat_key, products):
+                    print(f"{cat_key} vektör dosyaları yazıldı.")
                 print(f"{cat_key}.json zaten güncel.")
 
 
@@ -4,21 +4,12 @@ import json
 from pathlib import Path
 from typing import List
 
-from sentence_transformers import SentenceTransformer
-
 from config.config_loader import get_config
+from tools.data_tool.model_registry import get_sentence_model, model_name
+from tools.data_tool.vector_store import attach_vectors, save_products, sync_vectors
 
 
-def _get_model_name() -> str:
-    cfg = get_config()
-    models = cfg.get_models() or {}
-    st = models.get("text_st", {}) or {}
-    return st.get("model_name", "sentence-transformers:all-MiniLM-L6-v2").split(":")[-1]
-
-
-MODEL_NAME = _get_model_name()
-print(f"Loading Sentence-Transformers model: {MODEL_NAME}")
-model = SentenceTransformer(MODEL_NAME)
+MODEL_NAME = model_name("text_st").split(":")[-1]
 
 
 def build_text(item: dict) -> str:
@@ -47,6 +38,7 @@ def main():
 
             with file_path.open("r", encoding="utf-8") as f:
                 items = json.load(f)
+            attach_vectors(data_dir, cat_key, items)
 
             batch_texts = []
             batch_indices = []
@@ -62,6 +54,7 @@ def main():
 
             if batch_texts:
                 print(f"Embedding {len(batch_texts)} item(s)...")
+                model = get_sentence_model("text_st")
                 embeddings = model.encode(
                     batch_texts,
                     normalize_embeddings=True,
@@ -71,10 +64,11 @@ def main():
                 for i, emb in zip(batch_indices, embeddings):
                     items[i]["text_vector_st"] = emb.tolist()
 
-                with file_path.open("w", encoding="utf-8") as f:
-                    json.dump(items, f, indent=2, ensure_ascii=False)
+                save_products(file_path, data_dir, cat_key, items)
                 print(f"Kaydedildi: {file_path}")
             else:
+                if sync_vectors(data_dir, cat_key, items):
+                    print(f"Vektör dosyaları yazıldı: {cat_key}")
                 print(f"Zaten güncel: {file_path}")
 
 
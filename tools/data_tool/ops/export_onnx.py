@@ -0,0 +1,36 @@
+# tools/data_tool/ops/export_onnx.py
+
+import typer
+
+from config.config_loader import get_config
+from tools.data_tool.model_registry import model_name
+from tools.data_tool.onnx_backend import export_model, onnx_dir, quantize_model, tower_file
+
+app = typer.Typer()
+
+
+@app.command()
+def main(
+    keys: str = typer.Option("", help="models anahtarları (virgülle; boşsa tümü)"),
+    int8: bool = typer.Option(True, help="int8 dinamik kuantize kopyaları da üret"),
+):
+    """MiniLM, CLIP-text ve CLIP-image kulelerini ONNX'e aktarır (models.<key>.backend: onnx | onnx-int8 için)."""
+    cfg = get_config()
+    selected = [k.strip() for k in keys.split(",") if k.strip()] or list(cfg.get_models() or {})
+
+    # Aynı model adına sahip anahtarlar (clip / text_clip) tek export paylaşır
+    for name in dict.fromkeys(model_name(key) for key in selected):
+        print(f"\nModel: {name}")
+        meta = export_model(name)
+        if int8:
+            meta = quantize_model(name, meta)
+        out_dir = onnx_dir(name)
+        for tower in meta["towers"]:
+            sizes = [f"{tower_file(out_dir, tower, q).stat().st_size / 1e6:.1f}MB"
+                     for q in ([False, True] if int8 else [False])]
+            print(f"  {tower}: {' → int8 '.join(sizes)}")
+        print(f"  Kaydedildi: {out_dir}")
+
+
+if __name__ == "__main__":
+    app()
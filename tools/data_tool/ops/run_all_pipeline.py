@@ -137,6 +137,7 @@ def check_required_scripts():
         BASE_DIR / "tools" / "data_tool" / "ops" / "embed_text_clip.py", 
         BASE_DIR / "tools" / "data_tool" / "ops" / "embed_text_st.py",
         BASE_DIR / "tools" / "data_tool" / "ops" / "embed_combined.py",
+        BASE_DIR / "tools" / "data_tool" / "ops" / "build_ann.py",
         BASE_DIR / "tools" / "data_tool" / "ops" / "sentiment_pipeline.py",
         BASE_DIR / "tools" / "data_tool" / "ops" / "calc_metrics.py",
         BASE_DIR / "tools" / "data_tool" / "ops" / "rating_updater.py"
@@ -193,7 +194,8 @@ def main():
             BASE_DIR / "tools" / "data_tool" / "ops" / "embed_clip.py",
             BASE_DIR / "tools" / "data_tool" / "ops" / "embed_text_clip.py",
             BASE_DIR / "tools" / "data_tool" / "ops" / "embed_text_st.py", 
-            BASE_DIR / "tools" / "data_tool" / "ops" / "embed_combined.py"
+            BASE_DIR / "tools" / "data_tool" / "ops" / "embed_combined.py",
+            BASE_DIR / "tools" / "data_tool" / "ops" / "build_ann.py"
         ]
         
         for script in scripts_to_run:
@@ -0,0 +1,277 @@
+# tools/data_tool/search/ann.py
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.config_loader import get_config
+
+try:
+    import hnswlib
+except ImportError:  # opsiyonel bağımlılık
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+
+def ann_config() -> Dict[str, Any]:
+    return get_config().get_search_config().get("ann", {}) or {}
+
+
+def rows_signature(ids: List[str], shops: List[str], mat: np.ndarray, rows: Optional[np.ndarray] = None,
+                   block: int = 8192) -> str:
+    """
+    Kaydedilmiş ANN yapısının güncel indeksle aynı satırlara ve aynı vektörlere ait olup olmadığını
+    anlamak için. Matris içeriği de özetlenir: yeniden embed edilen (id'leri aynı) katalogda eski yapı kullanılmaz.
+    rows: sadece bu (global) satırlar; ANN yapıları global satır numarası tuttuğu için numaralar da özetlenir.
+    """
+    rows = np.arange(len(ids), dtype=np.int64) if rows is None else np.asarray(rows, dtype=np.int64)
+    h = hashlib.sha1(f"{len(rows)}|{mat.shape[1]}|{mat.dtype.str}".encode("utf-8"))
+    h.update(rows.tobytes())
+    for r in rows.tolist():
+        h.update(f"\n{shops[r]}/{ids[r]}".encode("utf-8"))
+    for start in range(0, len(rows), block):
+        h.update(np.ascontiguousarray(mat[rows[start:start + block]]).data)
+    return h.hexdigest()
+
+
+def _spherical_kmeans(x: np.ndarray, nlist: int, n_iter: int = 10, seed: int = 0) -> np.ndarray:
+    """Normalize vektörler için k-means (benzerlik = iç çarpım); merkezler de normalize."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=nlist, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = x[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:
+                # Boş küme: rastgele bir noktayla yeniden başlat
+                centroids[c] = x[rng.integers(len(x))]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    NumPy inverted-file indeks: satırlar en yakın merkeze atanır (CSR listeleri),
+    sorguda en iyi nprobe listesi aday olarak döner.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_rows: np.ndarray,
+                 nprobe: int = 8):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = int(nprobe)
+
+    @classmethod
+    def build(cls, mat: np.ndarray, valid: np.ndarray, nlist: int = 64, nprobe: int = 8,
+              n_iter: int = 10, max_train: int = 50000, seed: int = 0) -> "IVFIndex":
+        rows = np.flatnonzero(valid)
+        x = mat[rows]
+        nlist = max(1, min(int(nlist), len(rows)))
+        rng = np.random.default_rng(seed)
+        train = x if len(x) <= max_train else x[rng.choice(len(x), size=max_train, replace=False)]
+        centroids = _spherical_kmeans(train, nlist, n_iter=n_iter, seed=seed)
+
+        # Atama: bellek için parça parça
+        assign = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), 8192):
+            assign[start:start + 8192] = np.argmax(x[start:start + 8192] @ centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, offsets, rows[order].astype(np.int64), nprobe=nprobe)
+
+    def candidates(self, q: np.ndarray, n: int) -> np.ndarray:
+        probe = min(self.nprobe, len(self.centroids))
+        sims = self.centroids @ q
+        lists = np.argpartition(-sims, probe - 1)[:probe] if probe < len(sims) else np.arange(len(sims))
+        parts = [self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in lists]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def save(self, path: Path) -> None:
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets, list_rows=self.list_rows)
+
+    @classmethod
+    def load(cls, path: Path, nprobe: int = 8) -> "IVFIndex":
+        with np.load(path) as npz:
+            return cls(npz["centroids"], npz["list_offsets"], npz["list_rows"], nprobe=nprobe)
+
+
+class HNSWIndex:
+    """hnswlib (kuruluysa) üzerinde HNSW grafı; iç çarpım uzayı."""
+
+    kind = "hnsw"
+
+    def __init__(self, index, ef_search: int = 64):
+        self.index = index
+        self.index.set_ef(int(ef_search))
+
+    @classmethod
+    def build(cls, mat: np.ndarray, valid: np.ndarray, M: int = 16, ef_construction: int = 200,
+              ef_search: int = 64) -> "HNSWIndex":
+        if hnswlib is None:
+            raise RuntimeError("hnswlib kurulu değil")
+        rows = np.flatnonzero(valid)
+        index = hnswlib.Index(space="ip", dim=mat.shape[1])
+        index.init_index(max_elements=max(1, len(rows)), ef_construction=int(ef_construction), M=int(M))
+        index.add_items(mat[rows], rows)
+        return cls(index, ef_search=ef_search)
+
+    def candidates(self, q: np.ndarray, n: int) -> np.ndarray:
+        n = min(n, self.index.get_current_count())
+        if n <= 0:
+            return np.empty(0, dtype=np.int64)
+        self.index.set_ef(max(self.index.ef, n))
+        labels, _ = self.index.knn_query(q, k=n)
+        return labels[0].astype(np.int64)
+
+    def save(self, path: Path) -> None:
+        self.index.save_index(str(path))
+
+    @classmethod
+    def load(cls, path: Path, dim: int, ef_search: int = 64) -> "HNSWIndex":
+        if hnswlib is None:
+            raise RuntimeError("hnswlib kurulu değil")
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.load_index(str(path))
+        return cls(index, ef_search=ef_search)
+
+
+def build_ann(mat: np.ndarray, valid: np.ndarray, params: Dict[str, Any]):
+    """params: config.search.ann.kinds.<tür> (type: ivf | hnsw)"""
+    ann_type = params.get("type", "ivf")
+    if ann_type == "hnsw":
+        if hnswlib is None:
+            logger.warning("hnswlib kurulu değil; IVF'e düşülüyor")
+        else:
+            return HNSWIndex.build(mat, valid, M=params.get("M", 16),
+                                   ef_construction=params.get("ef_construction", 200),
+                                   ef_search=params.get("ef_search", 64))
+    return IVFIndex.build(mat, valid, nlist=params.get("nlist", 64), nprobe=params.get("nprobe", 8))
+
+
+def _ann_dir(category: str) -> Path:
+    cfg = get_config()
+    return cfg.get_absolute_path(ann_config().get("dir", "state/ann")) / category
+
+
+def save_ann(category: str, kind: str, ann, signature: str, params: Dict[str, Any]) -> Path:
+    out_dir = _ann_dir(category)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    data_path = out_dir / (f"{kind}.ivf.npz" if ann.kind == "ivf" else f"{kind}.hnsw.bin")
+    ann.save(data_path)
+    meta = {"type": ann.kind, "signature": signature, "params": params, "file": data_path.name}
+    (out_dir / f"{kind}.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return data_path
+
+
+def load_ann(category: str, kind: str, signature: str, dim: int, params: Dict[str, Any]):
+    """Pipeline'ın kaydettiği yapıyı yükler; imza tutmuyorsa None."""
+    meta_path = _ann_dir(category) / f"{kind}.json"
+    if not meta_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("signature") != signature:
+            return None
+        data_path = meta_path.parent / meta["file"]
+        if meta["type"] == "hnsw":
+            return HNSWIndex.load(data_path, dim, ef_search=params.get("ef_search", 64))
+        return IVFIndex.load(data_path, nprobe=params.get("nprobe", 8))
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        logger.warning(f"ANN yüklenemedi {meta_path}: {e}")
+        return None
+
+
+class PartitionedANN:
+    """
+    Birleşik indeksin kategori bölümleri için ayrı ANN yapıları (satır numaraları globaldir).
+    Kategori sorgusu sadece kendi bölümünün adaylarını alır; diğer kategorilerin adayları maskede
+    elenip top_n'in altına düşülmez (tam taramaya düşme yok). min_rows altındaki bölümlerin
+    geçerli satırları doğrudan aday döner (küçük: hepsi yeniden skorlanır).
+    """
+
+    kind = "partitioned"
+
+    def __init__(self, parts: Dict[str, Any], rest: Dict[str, np.ndarray]):
+        self.parts = parts
+        self.rest = rest
+
+    def candidates(self, q: np.ndarray, n: int, partition: Optional[str] = None) -> np.ndarray:
+        names = list(self.parts) + list(self.rest) if partition is None else [partition]
+        out = [self.parts[name].candidates(q, n) if name in self.parts
+               else self.rest.get(name, np.empty(0, dtype=np.int64)) for name in names]
+        return np.concatenate(out) if out else np.empty(0, dtype=np.int64)
+
+
+def category_partitions(category: str, categories: List[str],
+                        codes: np.ndarray) -> Dict[str, Optional[np.ndarray]]:
+    """Kategori → satır maskesi; tek kategorili indekste tüm satırlar (None)."""
+    if len(categories) <= 1:
+        return {category: None}
+    return {cat: codes == code for code, cat in enumerate(categories)}
+
+
+def _partition_key(category: str, part: str) -> str:
+    return category if part == category else f"{category}/{part}"
+
+
+def partitioned_ann(category: str, kind: str, mat: np.ndarray, valid: np.ndarray,
+                    partitions: Dict[str, Optional[np.ndarray]], ids: List[str], shops: List[str],
+                    params: Dict[str, Any], min_rows: int, reuse: bool = True,
+                    save: bool = False) -> Optional[PartitionedANN]:
+    """
+    Her bölüm için yapıyı diskten yükler (reuse), yoksa kurar (save: pipeline kaydeder).
+    Hiçbir bölüm min_rows'a ulaşmıyorsa None (tür brute force ile kalır).
+    """
+    parts, rest = {}, {}
+    for part, mask in partitions.items():
+        part_valid = valid if mask is None else valid & mask
+        rows = np.flatnonzero(part_valid)
+        if len(rows) < min_rows:
+            rest[part] = rows
+            continue
+        key = _partition_key(category, part)
+        signature = rows_signature(ids, shops, mat, rows)
+        ann = load_ann(key, kind, signature, mat.shape[1], params) if reuse else None
+        if ann is None:
+            ann = build_ann(mat, part_valid, params)
+            if save:
+                save_ann(key, kind, ann, signature, params)
+            else:
+                logger.info(f"ANN kuruldu (kayıt yok/eski): {key}/{kind} → {ann.kind}")
+        parts[part] = ann
+    return PartitionedANN(parts, rest) if parts else None
+
+
+def attach_ann(category: str, matrices: Dict[str, np.ndarray], valid: Dict[str, np.ndarray],
+               ids: List[str], shops: List[str], categories: List[str], codes: np.ndarray) -> Dict[str, Any]:
+    """
+    Config'te ANN açık olan vektör türleri için kategori bölümü başına yapıyı diskten yükler, yoksa kurar.
+    min_rows altındaki bölümler brute force ile kalır.
+    """
+    cfg = ann_config()
+    if not cfg.get("enabled", False):
+        return {}
+
+    partitions = category_partitions(category, categories, codes)
+    out = {}
+    for kind, params in (cfg.get("kinds", {}) or {}).items():
+        mat = matrices.get(kind)
+        if mat is None:
+            continue
+        ann = partitioned_ann(category, kind, mat, valid[kind], partitions, ids, shops, params or {},
+                              int(cfg.get("min_rows", 5000)))
+        if ann is not None:
+            out[kind] = ann
+    return out
@@ -0,0 +1,109 @@
+# tools/data_tool/search/batching.py
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class MicroBatcher:
+    """
+    Eşzamanlı isteklerden gelen girdileri kısa bir pencerede (max_wait_ms)
+    ya da max_batch_size dolana kadar toplar, tek bir fn(list) çağrısıyla işler
+    ve sonuçları bekleyen isteklere dağıtır.
+    fn: girdi listesi alıp aynı sırada çıktı listesi döndürmeli.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 16,
+                 max_wait_ms: float = 3.0, name: str = "batcher"):
+        self._fn = fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.inline = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    def __call__(self, item: Any) -> Any:
+        """
+        Girdiyi kuyruğa koyar ve toplu işlem sonucunu bekler.
+        Event loop thread'inden çağrılırsa beklemeden tek başına işlenir: loop bloklandığı için
+        aynı batch'e girecek başka istek gelemez, max_wait_ms sadece gecikme olurdu.
+        """
+        if _on_event_loop():
+            self.inline += 1
+            return self._fn([item])[0]
+        return self.submit(item).result()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            inputs = [item for item, _ in batch]
+            try:
+                outputs = self._fn(inputs)
+                if len(outputs) != len(inputs):
+                    raise RuntimeError(f"{self.name}: {len(inputs)} girdi için {len(outputs)} çıktı")
+            except Exception as e:
+                logger.error(f"{self.name} batch hatası: {e}")
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            self.max_seen = max(self.max_seen, len(batch))
+            for (_, fut), out in zip(batch, outputs):
+                fut.set_result(out)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_seen,
+            "inline_calls": self.inline,
+            "queue_depth": self._queue.qsize(),
+        }
@@ -0,0 +1,159 @@
+# tools/data_tool/search/bounded_executor.py
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+from tools.data_tool.search.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "search_executor_queue_wait_seconds", "Arama havuzu kuyruk bekleme süresi (saniye)", ("pool",),
+)
+SERVICE_SECONDS = REGISTRY.histogram(
+    "search_executor_service_seconds", "Arama havuzunda iş çalışma süresi (saniye)", ("pool",),
+)
+
+
+class Overloaded(Exception):
+    """
+    Havuz işi kabul edemedi. status_code: 429 (kuyruk dolu) | 503 (kuyrukta çok bekledi, iş atıldı);
+    retry_after: istemciye önerilen bekleme (saniye).
+    """
+
+    def __init__(self, name: str, status_code: int, retry_after: int, reason: str):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class BoundedExecutor:
+    """
+    Engelleyici (CPU ağırlıklı) işleri event loop dışında, sabit boyutlu bir thread havuzunda çalıştırır.
+    Çalışan + bekleyen iş sayısı max_workers + max_queue'ya ulaşınca yeni iş hemen reddedilir (429);
+    kuyrukta max_wait_ms'den uzun bekleyen iş çalıştırılmadan atılır (503).
+    Kuyruk bekleme ve çalışma süreleri son window işi üzerinden raporlanır.
+    Thread havuzu: modeller ve indeks süreç içinde paylaşılır; NumPy / torch GIL'i bırakır.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, max_queue: int = 16,
+                 max_wait_ms: float = 0, window: int = 1024):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait = max(0.0, float(max_wait_ms or 0)) / 1000.0
+        self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._running = 0
+        self._waits = deque(maxlen=window)
+        self._service = deque(maxlen=window)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.shed = 0
+
+    def retry_after(self) -> int:
+        """Kuyruğun boşalması için tahmini süre (en az 1 sn)."""
+        with self._lock:
+            service = float(np.mean(self._service)) if self._service else 1.0
+            queued = max(0, self._inflight - self._running)
+        return max(1, math.ceil(service * (queued + 1) / self.max_workers))
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._inflight -= 1
+
+    def _job(self, enqueued: float, fn: Callable, args: tuple, kwargs: dict):
+        wait = time.perf_counter() - enqueued
+        QUEUE_WAIT_SECONDS.observe(wait, pool=self.name)
+        with self._lock:
+            self._waits.append(wait)
+            if self.max_wait and wait > self.max_wait:
+                self.shed += 1
+                shed = True
+            else:
+                self._running += 1
+                shed = False
+        if shed:
+            raise Overloaded(self.name, 503, self.retry_after(), f"kuyrukta {wait * 1000:.0f}ms bekledi")
+
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            service = time.perf_counter() - start
+            SERVICE_SECONDS.observe(service, pool=self.name)
+            with self._lock:
+                self._running -= 1
+                self._service.append(service)
+        with self._lock:
+            self.completed += 1
+        return result
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """fn(*args, **kwargs)'ı havuzda çalıştırıp sonucu bekler; havuz doluysa Overloaded(429)."""
+        with self._lock:
+            if self._inflight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                full = True
+            else:
+                self._inflight += 1
+                self.submitted += 1
+                full = False
+        if full:
+            raise Overloaded(self.name, 429, self.retry_after(), "kuyruk dolu")
+
+        try:
+            future = self._pool.submit(self._job, time.perf_counter(), fn, args, kwargs)
+        except RuntimeError:
+            self._release()
+            raise
+        # Slot iş bitince bırakılır (istemci bağlantıyı kesse de iş sürerken dolu sayılır)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _percentiles_ms(values) -> Dict[str, float]:
+        if not values:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        arr = np.asarray(values) * 1000.0
+        return {"p50": round(float(np.percentile(arr, 50)), 2),
+                "p95": round(float(np.percentile(arr, 95)), 2),
+                "max": round(float(arr.max()), 2)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits, service = list(self._waits), list(self._service)
+            running, queued = self._running, max(0, self._inflight - self._running)
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "queue_wait_ms": self._percentiles_ms(waits),
+            "service_ms": self._percentiles_ms(service),
+        }
@@ -0,0 +1,126 @@
+# tools/data_tool/search/embedding_cache.py
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Boyut (LRU) ve süre (TTL) sınırlı embedding cache'i.
+    Değerler float32 vektör tuple'larıdır; istenirse .npz olarak diske yazılır
+    ki yeniden başlatmada sıcak küme kaybolmasın.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 0,
+                 persist_path: Optional[Union[str, Path]] = None):
+        self.max_size = int(max_size)
+        self.ttl_seconds = float(ttl_seconds or 0)
+        self.persist_path = Path(persist_path) if persist_path else None
+        self._data: "OrderedDict[Hashable, Tuple[float, Tuple[np.ndarray, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.persist_path:
+            self.load()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def get(self, key: Hashable) -> Optional[Tuple[np.ndarray, ...]]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[0], now):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Tuple[np.ndarray, ...]) -> None:
+        frozen = []
+        for v in value:
+            v = np.array(v, dtype=np.float32)
+            v.flags.writeable = False
+            frozen.append(v)
+        with self._lock:
+            self._data[key] = (time.time(), tuple(frozen))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def save(self) -> bool:
+        """Cache'i persist_path'e yazar (anahtarlar str olmalı)."""
+        if not self.persist_path:
+            return False
+        with self._lock:
+            entries = [(k, created, vals) for k, (created, vals) in self._data.items()]
+        if not entries:
+            return False
+        arrays = {
+            "keys": np.array([str(k) for k, _, _ in entries], dtype=str),
+            "created": np.array([c for _, c, _ in entries], dtype=np.float64),
+        }
+        for i in range(len(entries[0][2])):
+            arrays[f"v{i}"] = np.stack([vals[i] for _, _, vals in entries])
+
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.persist_path.with_suffix(".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.persist_path)
+        logger.info(f"Embedding cache kaydedildi: {self.persist_path} ({len(entries)} kayıt)")
+        return True
+
+    def load(self) -> int:
+        """persist_path'ten süresi geçmemiş kayıtları yükler."""
+        if not self.persist_path or not self.persist_path.exists():
+            return 0
+        try:
+            with np.load(self.persist_path) as npz:
+                keys = npz["keys"]
+                created = npz["created"]
+                parts = [npz[f"v{i}"] for i in range(len([n for n in npz.files if n.startswith("v")]))]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Embedding cache okunamadı {self.persist_path}: {e}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for i, key in enumerate(keys):
+                if self._expired(float(created[i]), now):
+                    continue
+                vals = []
+                for part in parts:
+                    v = np.array(part[i], dtype=np.float32)
+                    v.flags.writeable = False
+                    vals.append(v)
+                self._data[str(key)] = (float(created[i]), tuple(vals))
+                loaded += 1
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        return loaded
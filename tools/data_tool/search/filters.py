@@ -0,0 +1,119 @@
+# tools/data_tool/search/filters.py
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+def _norm(value) -> str:
+    return str(value).strip().lower()
+
+
+def _color_matches(term: str, color: str) -> bool:
+    """'blue' → 'blue', 'navy blue', 'dark blue' ile eşleşir (kelime bazlı)."""
+    return term == color or term in color.split()
+
+
+class SearchFilters:
+    """
+    Arama öncesi yapısal filtreler. Boş bırakılan alan filtrelenmez;
+    brands / colors listelerinden herhangi biri eşleşmesi yeterli.
+    size: o bedenin stokta (isAvailable) olması.
+    """
+
+    def __init__(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+                 brands: Optional[Iterable[str]] = None, colors: Optional[Iterable[str]] = None,
+                 size: Optional[str] = None):
+        self.min_price = min_price
+        self.max_price = max_price
+        self.brands = sorted({_norm(b) for b in brands or [] if str(b).strip()})
+        self.colors = sorted({_norm(c) for c in colors or [] if str(c).strip()})
+        self.size = _norm(size) if size not in (None, "") else None
+
+    def is_empty(self) -> bool:
+        return (self.min_price is None and self.max_price is None
+                and not self.brands and not self.colors and self.size is None)
+
+    def key(self) -> tuple:
+        """Cache anahtarı vb. için kararlı temsil."""
+        return (self.min_price, self.max_price, tuple(self.brands), tuple(self.colors), self.size)
+
+    def matches(self, item: dict) -> bool:
+        """Tek kayıt için aynı kurallar (ör. Pricelens varyantları)."""
+        price = item.get("price")
+        if self.min_price is not None or self.max_price is not None:
+            if not isinstance(price, (int, float)):
+                return False
+            if self.min_price is not None and price < self.min_price:
+                return False
+            if self.max_price is not None and price > self.max_price:
+                return False
+        if self.brands and _norm(item.get("brand", "")) not in self.brands:
+            return False
+        if self.colors:
+            item_colors = [_norm(c) for c in item.get("colors") or []]
+            if not any(_color_matches(t, c) for t in self.colors for c in item_colors):
+                return False
+        if self.size is not None:
+            if not any(_norm(s.get("size", "")) == self.size and s.get("isAvailable")
+                       for s in item.get("stock") or []):
+                return False
+        return True
+
+
+class FilterColumns:
+    """
+    İndeks satırlarıyla hizalı sütunlar: fiyat (float), marka kodu ve
+    renk / stoktaki beden için satır listeleri. Filtre maskesi tek geçişte vektörel kurulur.
+    """
+
+    def __init__(self, items: List[dict]):
+        n = len(items)
+        self.n_rows = n
+        self.price = np.full(n, np.nan, dtype=np.float64)
+        self.brand_codes = np.full(n, -1, dtype=np.int32)
+        self.brand_vocab: Dict[str, int] = {}
+        color_rows: Dict[str, List[int]] = {}
+        size_rows: Dict[str, List[int]] = {}
+
+        for row, item in enumerate(items):
+            price = item.get("price")
+            if isinstance(price, (int, float)):
+                self.price[row] = price
+            brand = _norm(item.get("brand", ""))
+            if brand:
+                self.brand_codes[row] = self.brand_vocab.setdefault(brand, len(self.brand_vocab))
+            for color in {_norm(c) for c in item.get("colors") or []}:
+                color_rows.setdefault(color, []).append(row)
+            for s in item.get("stock") or []:
+                if s.get("isAvailable"):
+                    size_rows.setdefault(_norm(s.get("size", "")), []).append(row)
+
+        self.color_rows = {c: np.asarray(r, dtype=np.int64) for c, r in color_rows.items()}
+        self.size_rows = {s: np.unique(np.asarray(r, dtype=np.int64)) for s, r in size_rows.items()}
+
+    def _rows_mask(self, postings: List[np.ndarray]) -> np.ndarray:
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for rows in postings:
+            mask[rows] = True
+        return mask
+
+    def mask(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """Filtreyi sağlayan satırlar için boolean maske; filtre yoksa None."""
+        if filters is None or filters.is_empty():
+            return None
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        if filters.min_price is not None:
+            mask &= self.price >= filters.min_price  # NaN (fiyatsız) → False
+        if filters.max_price is not None:
+            mask &= self.price <= filters.max_price
+        if filters.brands:
+            codes = [self.brand_vocab[b] for b in filters.brands if b in self.brand_vocab]
+            mask &= np.isin(self.brand_codes, codes)
+        if filters.colors:
+            mask &= self._rows_mask([rows for color, rows in self.color_rows.items()
+                                     if any(_color_matches(t, color) for t in filters.colors)])
+        if filters.size is not None:
+            mask &= self._rows_mask([self.size_rows[filters.size]] if filters.size in self.size_rows else [])
+        return mask
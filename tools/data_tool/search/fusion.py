@@ -0,0 +1,108 @@
+# tools/data_tool/search/fusion.py
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config_loader import get_config
+
+_cfg = get_config()
+_fusion_cfg = _cfg.get_search_config().get("fusion", {}) or {}
+
+# RRF sabiti ve yöntem ağırlıkları (config: search.fusion)
+RRF_K = float(_fusion_cfg.get("k", 60))
+RRF_WEIGHTS: Dict[str, float] = {m: float(w) for m, w in (_fusion_cfg.get("weights", {}) or {}).items()}
+
+
+def rrf_fuse(method_rows: Dict[str, np.ndarray], keys: np.ndarray, k: Optional[float] = None,
+             weights: Optional[Dict[str, float]] = None,
+             limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reciprocal rank fusion, dizilerle: her yöntem için sıralı indeks satırları verilir,
+    satırlar keys (ör. ürün kodu) üzerinden birleştirilir; skor = Σ w_m / (k + rank).
+    (temsilci satırlar, RRF skorları) döndürür; skor azalan, eşitlikte ilk görülen önce.
+    Temsilci satır, anahtarın yöntem sırasına göre ilk görüldüğü satırdır.
+    limit verilirse sadece ilk limit sonuç sıralanır.
+    """
+    k = RRF_K if k is None else float(k)
+    weights = RRF_WEIGHTS if weights is None else weights
+
+    rows_parts, contrib_parts = [], []
+    for method, rows in method_rows.items():
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            continue
+        rows_parts.append(rows)
+        contrib_parts.append(weights.get(method, 1.0) / (k + np.arange(1, len(rows) + 1, dtype=np.float64)))
+    if not rows_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    rows = np.concatenate(rows_parts)
+    contrib = np.concatenate(contrib_parts)
+    n = len(rows)
+
+    # (anahtar, konum) tek int64'te: tek sıralama hem gruplar hem ilk görüleni verir
+    composite = np.sort(keys[rows] * n + np.arange(n))
+    sorted_keys, pos = np.divmod(composite, n)
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    first = pos[starts]
+    scores = np.add.reduceat(contrib[pos], starts)
+
+    if limit is not None and limit < len(scores):
+        # Eşik skoru ve eşitler dahil adaylar; tam sıralama sadece bunlara
+        kth = np.partition(-scores, limit - 1)[limit - 1]
+        keep = np.flatnonzero(-scores <= kth)
+        first, scores = first[keep], scores[keep]
+
+    order = np.lexsort((first, -scores))[:limit]
+    return rows[first[order]], scores[order]
+
+
+def fusion_results(method_hits: Dict[str, Tuple[np.ndarray, np.ndarray]], ids: np.ndarray,
+                   items: Sequence[dict], keys: np.ndarray, k: Optional[float] = None,
+                   weights: Optional[Dict[str, float]] = None, limit: Optional[int] = None) -> List[tuple]:
+    """
+    rrf_fuse + arama modüllerinin beklediği format:
+    [(pid, {"item", "scores": {yöntem: {"rank", "score"}}, "rrf_score"}), ...]
+    Sözlükler sadece ilk limit sonuç için kurulur.
+    """
+    fused_rows, fused_scores = rrf_fuse({m: rows for m, (rows, _) in method_hits.items()}, keys, k, weights,
+                                        limit=limit)
+
+    # Yöntem başına anahtar → (ilk rank, skor); sadece çıktıya girecek anahtarlar için
+    wanted = set(keys[fused_rows].tolist())
+    per_method: Dict[str, Dict[int, Tuple[int, float]]] = {}
+    for method, (rows, scores) in method_hits.items():
+        ranks: Dict[int, Tuple[int, float]] = {}
+        for rank, (key, score) in enumerate(zip(keys[np.asarray(rows, dtype=np.int64)].tolist(),
+                                                np.asarray(scores).tolist()), 1):
+            if key in wanted and key not in ranks:
+                ranks[key] = (rank, score)
+        per_method[method] = ranks
+
+    out = []
+    for row, rrf_score in zip(fused_rows.tolist(), fused_scores.tolist()):
+        key = int(keys[row])
+        scores = {m: {"rank": r[key][0], "score": r[key][1]} for m, r in per_method.items() if key in r}
+        out.append((ids[row], {"item": items[row], "scores": scores, "rrf_score": rrf_score}))
+    return out
+
+
+def reciprocal_rank_fusion(results_dict, k: Optional[float] = None, weights: Optional[Dict[str, float]] = None):
+    """
+    Liste girdili RRF (geriye dönük): {yöntem: [(pid, score, item), ...]}.
+    Aynı birleştirme kuralı; pid'ler diziye çevrilip rrf_fuse ile skorlanır.
+    """
+    codes: Dict[str, int] = {}
+    ids, items, scores, method_hits = [], [], [], {}
+    for method, results in results_dict.items():
+        rows = []
+        for pid, score, item in results:
+            codes.setdefault(pid, len(codes))
+            rows.append(len(ids))
+            ids.append(pid)
+            items.append(item)
+            scores.append(score)
+        method_hits[method] = (np.asarray(rows, dtype=np.int64), np.asarray([scores[r] for r in rows]))
+    keys = np.asarray([codes[pid] for pid in ids], dtype=np.int64)
+    return fusion_results(method_hits, np.asarray(ids, dtype=object), items, keys, k, weights)
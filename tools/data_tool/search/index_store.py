@@ -0,0 +1,115 @@
+# tools/data_tool/search/index_store.py
+
+import hashlib
+import logging
+import mmap
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from config.config_loader import get_config
+
+logger = logging.getLogger(__name__)
+
+
+def shared_index_config() -> Dict[str, Any]:
+    return get_config().get_search_config().get("shared_index", {}) or {}
+
+
+def _store_root() -> Path:
+    return get_config().get_absolute_path(shared_index_config().get("dir", "state/index"))
+
+
+def matrices_digest(matrices: Dict[str, np.ndarray]) -> str:
+    """Matris içeriklerinin özeti: aynı katalogdan kurulan indeksler aynı dizini kullanır."""
+    h = hashlib.blake2b(digest_size=12)
+    for kind in sorted(matrices):
+        mat = np.ascontiguousarray(matrices[kind])
+        h.update(f"{kind}|{mat.dtype.str}|{mat.shape}".encode("utf-8"))
+        h.update(mat)
+    return h.hexdigest()
+
+
+def _save_npy_atomic(path: Path, arr: np.ndarray) -> None:
+    # Birden fazla worker aynı dosyayı aynı anda yazabilir: geçici ad süreç başına
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def _prune(name: str, keep: int, current: Path) -> None:
+    """Aynı indeksin eski dizinlerinden en yeni keep tanesi dışındakileri siler.
+    Hâlâ eşlenmiş dosyalar silinse de açık mmap'ler geçerli kalır (POSIX)."""
+    # Ad + "-" + hex özet: "all" budanırken "all-rescore-…" dizinleri eşleşmez
+    pattern = re.compile(rf"{re.escape(name)}-[0-9a-f]+")
+    dirs = sorted((p for p in current.parent.iterdir()
+                   if p.is_dir() and p != current and pattern.fullmatch(p.name)),
+                  key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in dirs[max(0, keep - 1):]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def is_mapped(arr: np.ndarray) -> bool:
+    """Dizi bir dosya eşlemesine (mmap) mı dayanıyor (sayfaları talep üzerine diskten okunur)."""
+    base = arr
+    while base is not None:
+        if isinstance(base, (np.memmap, mmap.mmap)):
+            return True
+        base = getattr(base, "base", None)
+    return False
+
+
+def _map_matrices(name: str, matrices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    out_dir = _store_root() / f"{name}-{matrices_digest(matrices)}"
+    mapped_matrices = dict(matrices)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for kind, mat in matrices.items():
+        if not mat.size:
+            continue  # boş dosya mmap edilemez
+        path = out_dir / f"{kind}.npy"
+        if not path.exists():
+            _save_npy_atomic(path, mat)
+        mapped = np.load(path, mmap_mode="r")
+        if mapped.shape != mat.shape or mapped.dtype != mat.dtype:
+            raise ValueError(f"{path}: {mapped.dtype}{mapped.shape} != {mat.dtype}{mat.shape}")
+        mapped_matrices[kind] = np.asarray(mapped)
+    os.utime(out_dir)
+    _prune(name, int(shared_index_config().get("keep", 2)), out_dir)
+    logger.info(f"Eşlenmiş indeks matrisleri: {name} → {out_dir}")
+    return mapped_matrices
+
+
+def share_matrices(name: str, matrices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Config'te açıksa indeks matrislerini içerik özetli bir dizine .npy olarak yazar (varsa yazmaz)
+    ve salt okunur mmap ile geri açar. Aynı içeriği kuran tüm worker süreçleri aynı dosyaları
+    eşler; matris sayfaları page cache'te bir kez tutulur, süreç başına kopya oluşmaz.
+    Kapalıysa ya da dosyalar yazılamazsa matrisler olduğu gibi döner.
+    """
+    if not shared_index_config().get("enabled", False) or not matrices:
+        return matrices
+    try:
+        return _map_matrices(name, matrices)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Paylaşımlı indeks yazılamadı ({name}), süreç içi matrisler kullanılıyor: {e}")
+        return matrices
+
+
+def spill_matrices(name: str, matrices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    share_matrices gibi, ama search.shared_index kapalı olsa da: sadece seyrek satır erişimi
+    yapılan matrisler (kuantize türlerin yeniden skorlama matrisleri) süreç belleği yerine
+    diskten eşlenir. Yazılamazsa matrisler bellekte kalır.
+    """
+    if not matrices:
+        return matrices
+    try:
+        return _map_matrices(name, matrices)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Matrisler diske yazılamadı ({name}), bellekte tutuluyor: {e}")
+        return matrices
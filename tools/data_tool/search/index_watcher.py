@@ -0,0 +1,140 @@
+# tools/data_tool/search/index_watcher.py
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from config.config_loader import get_config
+from tools.data_tool.search.vector_index import delta_config, get_index, merge_index, reload_index, update_index
+from tools.data_tool.vector_store import vector_dir
+
+logger = logging.getLogger(__name__)
+
+
+class IndexWatcher:
+    """
+    Dükkan ürün dosyalarını (product/<kategori>.json) ve vektör sidecar'larını izler;
+    değişiklikte etkilenen dosyaları arka planda indekse uygulayıp indeksi atomik olarak değiştirir.
+    search.delta açıksa sadece değişen ürünler delta segmentine girer; delta sınırı aşınca ya da
+    merge_interval_s dolunca ana indekse birleştirilir. Kapalıysa etkilenen kategoriler yeniden okunur.
+    watchfiles opsiyonel: kurulu değilse izleme başlamaz, API normal çalışır.
+    """
+
+    def __init__(self, debounce_ms: int = 1600):
+        self.debounce_ms = int(debounce_ms)
+        self._cfg = get_config()
+        self._delta_cfg = delta_config()
+        self.use_delta = bool(self._delta_cfg.get("enabled", True))
+        self.merge_interval = float(self._delta_cfg.get("merge_interval_s", 300))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.merges = 0
+        self.errors = 0
+        self.last_reload: Dict[str, Any] = {}
+
+    def _targets(self):
+        """(izlenecek kök dizinler, ürün dosyası → (dükkan, kategori), vektör dizini → (dükkan, kategori))"""
+        roots, product_files, vector_dirs = [], {}, {}
+        for shop in self._cfg.get_shops():
+            data_dir = self._cfg.get_shop_data_path(shop)
+            if not data_dir or not Path(data_dir).exists():
+                continue
+            roots.append(Path(data_dir))
+            for category in self._cfg.get_category_names():
+                cat_info = self._cfg.get_category(category)
+                product_file = Path(data_dir) / cat_info.get("product_file", f"product/{category}.json")
+                product_files[product_file.resolve()] = (shop, category)
+                vector_dirs[vector_dir(Path(data_dir), category).resolve()] = (shop, category)
+        return roots, product_files, vector_dirs
+
+    @staticmethod
+    def affected_shards(paths: Iterable[str], product_files: Dict[Path, Tuple[str, str]],
+                        vector_dirs: Dict[Path, Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Değişen dosya yollarından etkilenen (dükkan, kategori) çiftleri."""
+        shards = set()
+        for raw in paths:
+            path = Path(raw).resolve()
+            if path.name.endswith(".tmp") or ".tmp." in path.name:
+                continue  # atomik yazmanın geçici dosyası; asıl dosyanın olayı ayrıca gelir
+            if path in product_files:
+                shards.add(product_files[path])
+            elif path.parent in vector_dirs:
+                shards.add(vector_dirs[path.parent])
+        return shards
+
+    def reload(self, shards: Set[Tuple[str, str]]) -> None:
+        t = time.perf_counter()
+        categories = sorted({category for _, category in shards})
+        try:
+            if self.use_delta:
+                index = update_index(sorted(shards))
+            else:
+                index = reload_index(changed=categories)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"İndeks yeniden yüklenemedi ({sorted(shards)}): {e}")
+            return
+        self.reloads += 1
+        self.last_reload = {
+            "shards": [f"{shop}/{category}" for shop, category in sorted(shards)],
+            "mode": "delta" if self.use_delta else "rebuild",
+            "seconds": round(time.perf_counter() - t, 3),
+            "at": time.time(),
+            "rows": len(index.fused),
+            **index.delta_stats(),
+        }
+        logger.info(f"İndeks yenilendi: {self.last_reload}")
+
+    def maybe_merge(self) -> None:
+        """Delta merge_interval_s'den eskiyse ana indekse birleştirir."""
+        index = get_index()
+        if not index.pending or time.time() - index.delta_since < self.merge_interval:
+            return
+        try:
+            merge_index()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Delta birleştirilemedi: {e}")
+            return
+        self.merges += 1
+        logger.info(f"Delta ana indekse birleştirildi: {sorted(index.pending)}")
+
+    def _run(self):
+        try:
+            from watchfiles import watch
+        except ImportError:
+            logger.warning("watchfiles kurulu değil; indeks otomatik yenilenmeyecek")
+            return
+
+        roots, product_files, vector_dirs = self._targets()
+        if not roots:
+            return
+        logger.info(f"İndeks izleniyor: {len(product_files)} ürün dosyası")
+        # Değişiklik olmasa da periyodik olarak uyanıp delta yaşını kontrol eder
+        for changes in watch(*roots, stop_event=self._stop, debounce=self.debounce_ms, recursive=True,
+                             yield_on_timeout=self.use_delta):
+            shards = self.affected_shards((p for _, p in changes), product_files, vector_dirs)
+            if shards:
+                self.reload(shards)
+            elif self.use_delta:
+                self.maybe_merge()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "reloads": self.reloads,
+            "merges": self.merges,
+            "errors": self.errors,
+            "last_reload": self.last_reload,
+        }
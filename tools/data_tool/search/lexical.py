@@ -0,0 +1,144 @@
+# tools/data_tool/search/lexical.py
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config_loader import get_config
+from tools.data_tool.text_utils import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Alan ağırlıkları: terim frekansı alanlar üzerinden ağırlıklı toplanır (BM25F benzeri)
+DEFAULT_FIELDS = {"name": 3.0, "brand": 2.0, "model": 2.0, "tags": 1.0, "description": 1.0}
+
+
+def lexical_config() -> Dict:
+    return get_config().get_search_config().get("lexical", {}) or {}
+
+
+def tokenize(text: str) -> List[str]:
+    """normalize_text ile Türkçe karakter sadeleştirme + boşluktan bölme."""
+    return normalize_text(text).split()
+
+
+def _field_text(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value) if value is not None else ""
+
+
+class BM25Index:
+    """
+    Katalog alanları üzerinde bellek içi ters indeks.
+    Her (terim, satır) çifti için BM25 ağırlığı kurulumda hesaplanır; sorgu skoru
+    terim posting'lerinin tek bincount ile toplanmasıdır.
+    """
+
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, rows: np.ndarray,
+                 weights: np.ndarray, n_rows: int, phrases: Optional[Dict[str, np.ndarray]] = None,
+                 avgdl: float = 1.0):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self.n_rows = n_rows
+        self.avgdl = avgdl
+        # Normalize ürün adı ve "marka model" → satırlar (birebir eşleşme için)
+        self.phrases = phrases or {}
+
+    @classmethod
+    def build(cls, items: List[dict], fields: Optional[Dict[str, float]] = None,
+              k1: float = 1.2, b: float = 0.75, reference: Optional["BM25Index"] = None) -> "BM25Index":
+        """
+        reference verilirse (ör. delta segmenti için ana indeks) IDF ve ortalama doküman uzunluğu
+        iki korpusun toplamından hesaplanır; böylece iki indeksin skorları karşılaştırılabilir kalır.
+        """
+        fields = fields or DEFAULT_FIELDS
+        vocab: Dict[str, int] = {}
+        term_ids, doc_rows, tfs = [], [], []
+        doc_len = np.zeros(len(items), dtype=np.float64)
+        phrases: Dict[str, List[int]] = {}
+
+        for row, item in enumerate(items):
+            for phrase in {normalize_text(_field_text(item.get("name"))),
+                           normalize_text(f"{_field_text(item.get('brand'))} {_field_text(item.get('model'))}")}:
+                if phrase:
+                    phrases.setdefault(phrase, []).append(row)
+            tf: Dict[int, float] = {}
+            for field, weight in fields.items():
+                for token in tokenize(_field_text(item.get(field))):
+                    tid = vocab.setdefault(token, len(vocab))
+                    tf[tid] = tf.get(tid, 0.0) + weight
+                    doc_len[row] += weight
+            for tid, value in tf.items():
+                term_ids.append(tid)
+                doc_rows.append(row)
+                tfs.append(value)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_rows = np.asarray(doc_rows, dtype=np.int64)
+        tfs = np.asarray(tfs, dtype=np.float64)
+
+        n = len(items)
+        df = np.bincount(term_ids, minlength=len(vocab)).astype(np.float64)
+        avgdl = doc_len.mean() if n and doc_len.mean() > 0 else 1.0
+        n_idf = n
+        if reference is not None:
+            ref_df = np.diff(reference.offsets)
+            for token, tid in vocab.items():
+                ref_tid = reference.vocab.get(token)
+                if ref_tid is not None:
+                    df[tid] += ref_df[ref_tid]
+            n_idf += reference.n_rows
+            avgdl = reference.avgdl
+        idf = np.log1p((n_idf - df + 0.5) / (df + 0.5))
+        norm = k1 * (1.0 - b + b * doc_len[doc_rows] / avgdl)
+        weights = idf[term_ids] * tfs * (k1 + 1.0) / (tfs + norm)
+
+        # Terim sırasına göre CSR posting listeleri
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(term_ids, minlength=len(vocab)))]).astype(np.int64)
+        return cls(vocab, offsets, doc_rows[order], weights[order].astype(np.float32), n,
+                   phrases={p: np.asarray(r, dtype=np.int64) for p, r in phrases.items()}, avgdl=float(avgdl))
+
+    def exact_rows(self, query: str) -> np.ndarray:
+        """Sorgu bir ürünün adı ya da "marka model"iyle birebir aynıysa o satırlar."""
+        return self.phrases.get(normalize_text(query), np.empty(0, dtype=np.int64))
+
+    def scores(self, query: str) -> np.ndarray:
+        """Tüm satırlar için BM25 skoru (eşleşmeyen satır 0)."""
+        tids = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+        if not tids:
+            return np.zeros(self.n_rows, dtype=np.float32)
+        rows = np.concatenate([self.rows[self.offsets[t]:self.offsets[t + 1]] for t in tids])
+        weights = np.concatenate([self.weights[self.offsets[t]:self.offsets[t + 1]] for t in tids])
+        return np.bincount(rows, weights=weights, minlength=self.n_rows).astype(np.float32)
+
+    def top_k(self, query: str, top_n: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """En iyi top_n satır (sadece en az bir terimi eşleşenler), skor azalan."""
+        scores = self.scores(query)
+        hit = scores > 0
+        if mask is not None:
+            hit &= mask
+        cand = np.flatnonzero(hit)
+        if top_n <= 0 or not len(cand):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        cand_scores = scores[cand]
+        if top_n < len(cand):
+            part = np.argpartition(-cand_scores, top_n - 1)[:top_n]
+            cand, cand_scores = cand[part], cand_scores[part]
+        order = np.argsort(-cand_scores, kind="stable")
+        return cand[order], cand_scores[order]
+
+
+def build_lexical(name: str, items: List[dict], reference: Optional[BM25Index] = None) -> Optional[BM25Index]:
+    """Config'te açıksa katalog kayıtlarından BM25 indeksi kurar."""
+    cfg = lexical_config()
+    if not cfg.get("enabled", True):
+        return None
+    index = BM25Index.build(items, fields=cfg.get("fields") or DEFAULT_FIELDS,
+                            k1=cfg.get("k1", 1.2), b=cfg.get("b", 0.75), reference=reference)
+    logger.info(f"BM25 indeksi: {name} → {len(index.vocab)} terim, {len(index.rows)} posting")
+    return index
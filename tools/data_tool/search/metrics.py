@@ -0,0 +1,156 @@
+# tools/data_tool/search/metrics.py
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Prometheus metin biçimi (text/plain 0.0.4); prometheus_client'a bağımlı olmadan üretilir
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Saniye cinsinden kova sınırları: alt-milisaniye tarama adımlarından saniyelik model çağrılarına
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (etiketler, değer) örnekleri; toplayıcılar bunlardan MetricFamily listesi döndürür
+Sample = Tuple[Dict[str, str], float]
+
+
+class MetricFamily:
+    """Tek bir metrik adı altındaki örnekler (gauge / counter); toplayıcılar kazıma anında üretir."""
+
+    def __init__(self, name: str, kind: str, help: str, samples: Iterable[Sample] = ()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples = list(samples)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape_help(self.help)}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.samples:
+            lines.append(f"{self.name}{_labels(labels)} {_number(value)}")
+        return lines
+
+
+def gauge(name: str, help: str, samples: Iterable[Sample]) -> MetricFamily:
+    return MetricFamily(name, "gauge", help, samples)
+
+
+def counter(name: str, help: str, samples: Iterable[Sample]) -> MetricFamily:
+    return MetricFamily(name, "counter", help, samples)
+
+
+class Histogram:
+    """
+    Etiketli, thread-safe histogram. Kovalar kümülatif değil tutulur, kazımada toplanır;
+    observe sadece bir bisect + sayaç artışıdır (arama yolunda ihmal edilebilir maliyet).
+    """
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._lock = threading.Lock()
+        # etiket değerleri → [kova sayaçları (+Inf dahil), toplam, adet]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total, n) for key, (counts, total, n) in sorted(self._series.items())]
+        lines = [f"# HELP {self.name} {_escape_help(self.help)}", f"# TYPE {self.name} histogram"]
+        for key, counts, total, n in snapshot:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(labels)} {n}")
+        return lines
+
+
+class Registry:
+    """Süreç içi histogramlar + kazıma anında çağrılan toplayıcılar (cache, havuz, indeks durumu)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, help, labelnames, buckets)
+            return self._histograms[name]
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = list(self._histograms.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for histogram in histograms:
+            lines.extend(histogram.render())
+        for collector in collectors:
+            for family in collector():
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_value(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+REGISTRY = Registry()
+
+# Arama aşamaları: encode, lexical, scan, rrf, pricelens (arama fonksiyonlarında), format, serialize (API'de)
+STAGE_SECONDS = REGISTRY.histogram(
+    "search_stage_seconds", "Arama aşaması süresi (saniye)", ("search", "stage"),
+)
+
+
+@contextmanager
+def span(search: str, stage: str):
+    """Bloğun süresini search_stage_seconds{search, stage} histogramına yazar (hata olsa da)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, search=search, stage=stage)
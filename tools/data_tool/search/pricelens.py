@@ -0,0 +1,24 @@
+# tools/data_tool/search/pricelens.py
+
+from tools.data_tool.catalog import get_catalog
+
+
+def collect_variants(product_id, kategori, filters=None):
+    """
+    Tüm e-commerce'lerde aynı ürün: katalog indeksinden O(1), dosya okumadan.
+    Metin ve görsel aramanın Pricelens karşılaştırması için varyant listesi (sırasız).
+    """
+    variants = []
+    for item in get_catalog().variants(product_id, kategori):
+        if filters is not None and not filters.matches(item):
+            continue
+        variants.append({
+            "dukkan": item["dukkan"],
+            "name": item["name"],
+            "pricelens_score": item.get("pricelens_score", 0),
+            "price": item.get("price", "Bilinmiyor"),
+            "rating": item.get("rating", "N/A"),
+            "image": item["images"][0] if item.get("images") else None,
+            "item_data": item,
+        })
+    return variants
@@ -0,0 +1,174 @@
+# tools/data_tool/search/quantize.py
+
+import logging
+from typing import Any, Dict
+
+import numpy as np
+
+from config.config_loader import get_config
+from tools.data_tool.search.index_store import spill_matrices
+
+logger = logging.getLogger(__name__)
+
+# Kaba tarama parça boyu: int8 → float32 dönüşümü tüm matris için değil, parça parça yapılır
+SCAN_BLOCK_ROWS = 16384
+
+
+def quantization_config() -> Dict[str, Any]:
+    return get_config().get_search_config().get("quantization", {}) or {}
+
+
+class Int8Quantizer:
+    """
+    Boyut başına simetrik skaler int8 kuantizasyon: x ≈ codes * scale.
+    Skor: codes @ (q * scale); matrisin 1/4'ü kadar bellek okunur.
+    """
+
+    kind = "int8"
+
+    def __init__(self, codes: np.ndarray, scale: np.ndarray):
+        self.codes = codes
+        self.scale = scale
+
+    @classmethod
+    def build(cls, mat: np.ndarray, valid: np.ndarray) -> "Int8Quantizer":
+        if valid.any():
+            scale = np.abs(mat[valid]).max(axis=0) / 127.0
+        else:
+            scale = np.zeros(mat.shape[1], dtype=np.float32)
+        scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(mat / scale), -127, 127).astype(np.int8)
+        return cls(codes, scale)
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        qs = (q * self.scale).astype(np.float32)
+        out = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), SCAN_BLOCK_ROWS):
+            block = self.codes[start:start + SCAN_BLOCK_ROWS]
+            out[start:start + len(block)] = block.astype(np.float32) @ qs
+        return out
+
+    def scores_batch(self, Q: np.ndarray) -> np.ndarray:
+        """(N, B) skor matrisi; her kod parçası tüm sorgular için bir kez float32'ye çevrilir."""
+        qs = (Q * self.scale).astype(np.float32).T
+        out = np.empty((len(self.codes), len(Q)), dtype=np.float32)
+        for start in range(0, len(self.codes), SCAN_BLOCK_ROWS):
+            block = self.codes[start:start + SCAN_BLOCK_ROWS]
+            out[start:start + len(block)] = block.astype(np.float32) @ qs
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scale.nbytes
+
+
+def _kmeans(x: np.ndarray, k: int, n_iter: int = 10, seed: int = 0) -> np.ndarray:
+    """Öklid k-means (PQ alt uzayları normalize değildir)."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(n_iter):
+        d = (x ** 2).sum(1)[:, None] - 2 * x @ centroids.T + (centroids ** 2).sum(1)[None, :]
+        assign = np.argmin(d, axis=1)
+        for c in range(k):
+            members = x[assign == c]
+            centroids[c] = members.mean(axis=0) if len(members) else x[rng.integers(len(x))]
+    return centroids.astype(np.float32)
+
+
+class PQQuantizer:
+    """
+    Product quantization: vektör m alt uzaya bölünür, her alt uzay 256 merkezle
+    kodlanır (satır başına m bayt). Skor, sorgu başına kurulan (m, 256) tablodan toplanır.
+    """
+
+    kind = "pq"
+
+    def __init__(self, codebooks: np.ndarray, codes: np.ndarray, sub_dim: int):
+        self.codebooks = codebooks  # (m, ksub, sub_dim)
+        self.codes = codes          # (N, m) uint8
+        self.sub_dim = sub_dim
+
+    @classmethod
+    def build(cls, mat: np.ndarray, valid: np.ndarray, m: int = 16, n_iter: int = 10,
+              max_train: int = 20000, seed: int = 0) -> "PQQuantizer":
+        dim = mat.shape[1]
+        m = max(1, int(m))
+        if dim % m:
+            raise ValueError(f"PQ: boyut {dim}, m={m} ile bölünmüyor")
+        sub_dim = dim // m
+
+        rng = np.random.default_rng(seed)
+        train = mat[np.flatnonzero(valid)]
+        if len(train) > max_train:
+            train = train[rng.choice(len(train), size=max_train, replace=False)]
+        ksub = max(1, min(256, len(train)))
+
+        codebooks = np.zeros((m, ksub, sub_dim), dtype=np.float32)
+        codes = np.zeros((len(mat), m), dtype=np.uint8)
+        for j in range(m):
+            sl = slice(j * sub_dim, (j + 1) * sub_dim)
+            if len(train):
+                codebooks[j] = _kmeans(train[:, sl], ksub, n_iter=n_iter, seed=seed + j)
+            cb = codebooks[j]
+            cb_sq = (cb ** 2).sum(1)
+            for start in range(0, len(mat), SCAN_BLOCK_ROWS):
+                sub = mat[start:start + SCAN_BLOCK_ROWS, sl]
+                codes[start:start + len(sub), j] = np.argmin(cb_sq[None, :] - 2 * sub @ cb.T, axis=1)
+        return cls(codebooks, codes, sub_dim)
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        m = self.codebooks.shape[0]
+        lut = np.einsum("mkd,md->mk", self.codebooks, q.reshape(m, self.sub_dim)).astype(np.float32)
+        out = np.zeros(len(self.codes), dtype=np.float32)
+        for j in range(m):
+            out += lut[j][self.codes[:, j]]
+        return out
+
+    def scores_batch(self, Q: np.ndarray) -> np.ndarray:
+        return np.stack([self.scores(q) for q in Q], axis=1) if len(Q) else np.zeros((len(self.codes), 0), np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.codebooks.nbytes
+
+
+def build_quantizer(mat: np.ndarray, valid: np.ndarray, params: Dict[str, Any]):
+    """params: config.search.quantization (type: int8 | pq)"""
+    if params.get("type", "int8") == "pq":
+        return PQQuantizer.build(mat, valid, m=params.get("pq_m", 16))
+    return Int8Quantizer.build(mat, valid)
+
+
+def rescore_matrices(name: str, matrices: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Kuantize türlerin yeniden skorlama matrisleri: kaba tarama kodlarla yapıldığı için float matristen
+    sadece aday satırlar okunur. Matris rescore_dtype'a çevrilip diskten eşlenir (mmap); bellekte
+    sürekli tutulan kısım kodlardır, aday satırların sayfaları talep üzerine okunur.
+    """
+    dtype = np.float16 if quantization_config().get("rescore_dtype", "float32") == "float16" else np.float32
+    return spill_matrices(f"{name}-rescore", {kind: np.asarray(mat, dtype=dtype) for kind, mat in matrices.items()})
+
+
+def attach_quantizers(category: str, matrices: Dict[str, np.ndarray],
+                      valid: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """
+    Config'te kuantizasyon açıksa seçili vektör türleri için kodları üretir.
+    min_rows altındaki kategoriler float32 tam tarama ile kalır.
+    """
+    cfg = quantization_config()
+    if not cfg.get("enabled", False):
+        return {}
+
+    out = {}
+    for kind in cfg.get("kinds", []) or []:
+        mat = matrices.get(kind)
+        if mat is None or not mat.shape[1] or int(valid[kind].sum()) < int(cfg.get("min_rows", 0)):
+            continue
+        try:
+            out[kind] = build_quantizer(mat, valid[kind], cfg)
+        except ValueError as e:
+            logger.warning(f"{category}/{kind}: kuantizasyon atlandı: {e}")
+            continue
+        logger.info(f"Kuantize: {category}/{kind} → {out[kind].kind}, "
+                    f"{mat.nbytes / 1e6:.1f}MB → {out[kind].nbytes / 1e6:.1f}MB")
+    return out
@@ -0,0 +1,67 @@
+# tools/data_tool/search/result_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class ResultCache:
+    """
+    Biçimlenmiş arama sonuçları için boyut (LRU) ve süre (TTL) sınırlı cache.
+    Her okuma/yazma katalog sürümüyle yapılır; sürüm değişince tüm kayıtlar düşer.
+    """
+
+    def __init__(self, max_size: int = 5000, ttl_seconds: float = 0):
+        self.max_size = int(max_size)
+        self.ttl_seconds = float(ttl_seconds or 0)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None or (self.ttl_seconds > 0 and now - entry[0] > self.ttl_seconds):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, version: str) -> None:
+        with self._lock:
+            self._check_version(version)
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "catalog_version": self._version,
+        }
@@ -1,41 +1,128 @@
 # tools/data_tool/search/search_by_image.py
 
-import os
-import json
+import io
+import hashlib
 from pathlib import Path
 
 import numpy as np
-import torch
 from PIL import Image
-import open_clip
-import matplotlib.pyplot as plt
 
 # CONFIG =
 from config.config_loader import get_config
+from tools.data_tool.model_registry import get_clip, get_device, model_id
+from tools.data_tool.search.batching import MicroBatcher
+from tools.data_tool.search.embedding_cache import EmbeddingCache
+from tools.data_tool.search.metrics import span
+from tools.data_tool.search.pricelens import collect_variants
+from tools.data_tool.search.vector_index import ALL_CATEGORIES, get_index
 _cfg = get_config()
 
 BASE_DIR = _cfg.get_absolute_path("dukkans")                 
 DUKKANLAR = list(_cfg.get_shops().keys()) 
 KATEGORILER = list(_cfg.get_categories().keys())        
-device = "cuda" if torch.cuda.is_available() else "cpu"
 
-# MODEL LOAD 
-model, _, preprocess = open_clip.create_model_and_transforms("ViT-B-32", pretrained="laion2b_s34b_b79k")
-model = model.to(device).eval()
+# Yüklenen görsel, CLIP girişinin (decode_size) en az bu boyunda kalacak şekilde küçültülerek açılır
+_iu_cfg = _cfg.get_search_config().get("image_upload", {}) or {}
+DECODE_SIZE = int(_iu_cfg.get("decode_size", 224))
 
-# Optimize edilmiş cosine similarity 
-def cosine_sim(a, b):
+# Görsel embedding cache'i: anahtar = model kimliği + decode boyu + yüklenen dosyanın SHA256'sı
+IMAGE_MODEL_ID = f"{model_id('clip')}|decode{DECODE_SIZE}"
+_ic_cfg = _cfg.get_search_config().get("image_cache", {}) or {}
+image_cache = None
+if _ic_cfg.get("enabled", True):
+    _persist = _ic_cfg.get("persist_path")
+    image_cache = EmbeddingCache(
+        max_size=_ic_cfg.get("max_size", 2000),
+        ttl_seconds=_ic_cfg.get("ttl_seconds", 0),
+        persist_path=_cfg.get_absolute_path(_persist) if _persist else None,
+    )
+
+
+def image_digest(data: bytes) -> str:
+    """Ham görsel byte'larının SHA256 özeti (cache anahtarı)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode_image_tensors(tensors):
+    """Ön işlenmiş görsel tensörlerini tek batch'te kodlar; normalize float32 vektör listesi döndürür."""
+    # torch ve model ilk aramada (ya da API warm-up'ında) yüklenir
+    import torch
+
+    clip = get_clip("clip")
+    batch = torch.stack(list(tensors)).to(get_device())
+    with torch.no_grad():
+        image_features = clip.model.encode_image(batch)
+        image_features /= image_features.norm(dim=-1, keepdim=True)
+    return list(image_features.float().cpu().numpy().astype(np.float32))
+
+
+# Eşzamanlı görsel aramalarının tensörlerini tek encode_image çağrısında toplar
+_ib_cfg = (_cfg.get_search_config().get("batching", {}) or {}).get("image", {}) or {}
+image_batcher = None
+if _ib_cfg.get("enabled", True):
+    image_batcher = MicroBatcher(
+        encode_image_tensors,
+        max_batch_size=_ib_cfg.get("max_batch_size", 8),
+        max_wait_ms=_ib_cfg.get("max_wait_ms", 5),
+        name="image-encode-batcher",
+    )
+
+
+class InvalidImageError(ValueError):
+    """Yüklenen veri görsel olarak açılamadı."""
+
+
+def load_image(source, target_size: int = DECODE_SIZE) -> Image.Image:
     """
-    Normalize edilmiş vektörler için optimize edildi
+    Görseli (byte'lar ya da dosya yolu) RGB olarak açar; kısa kenarı target_size'ın
+    altına düşmeden erkenden küçültür. JPEG'te draft() DCT ölçeklemesiyle 1/2..1/8
+    çözünürlükte decode eder (12 MP fotoğrafta tam decode'un çok altında maliyet);
+    kalan fazlalık reduce() ile kutu filtresiyle tamsayı kata indirilir.
+    Son boyutlandırma yine CLIP preprocess'inde yapılır.
     """
-    a = np.array(a)
-    b = np.array(b)
-    return float(np.dot(a, b))
+    try:
+        image = Image.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source)
+        image.draft("RGB", (target_size, target_size))  # JPEG dışı biçimlerde etkisiz
+        image = image.convert("RGB")
+    except (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImageError(f"Görsel okunamadı: {e}") from e
+
+    factor = min(image.size) // target_size
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image
+
+
+def encode_image(image, image_hash=None):
+    """
+    Görseli (byte'lar ya da dosya yolu) normalize CLIP vektörüne çevirir.
+    image_hash verilmişse önce cache'e bakılır; isabet varsa görsel hiç açılmaz.
+    Decode + preprocess çağıranın thread'inde, model forward'ı batcher'da yapılır.
+    """
+    cache_key = f"{IMAGE_MODEL_ID}|{image_hash}" if image_hash else None
+    if image_cache is not None and cache_key:
+        cached = image_cache.get(cache_key)
+        if cached is not None:
+            return cached[0]
+
+    with span("image", "decode"):
+        image_tensor = get_clip("clip").preprocess(load_image(image))
+    with span("image", "encode"):
+        if image_batcher is not None:
+            query_vector = image_batcher(image_tensor)
+        else:
+            query_vector = encode_image_tensors([image_tensor])[0]
+
+    if image_cache is not None and cache_key:
+        image_cache.put(cache_key, (query_vector,))
+    return query_vector
 
 def show_image(img_path, title="Ürün"):
     """
     Ürün görselini göster - API modunda çalışmaz
     """
+    import matplotlib.pyplot as plt
+
     if Path(img_path).exists():
         img = Image.open(img_path)
         plt.imshow(img)
@@ -43,111 +130,55 @@ def show_image(img_path, title="Ürün"):
         plt.axis("off")
         plt.show()
 
-# RRF algoritması =
-def reciprocal_rank_fusion(results_dict, k=60):
-    """
-    RRF algoritması - görsel aramada hibrit sonuçlar
-    """
-    rrf_scores = {}
-    for method, results in results_dict.items():
-        for rank, (pid, name, score, item) in enumerate(results, 1):
-            if pid not in rrf_scores:
-                rrf_scores[pid] = {
-                    "name": name,
-                    "item": item,
-                    "scores": {},
-                    "rrf_score": 0.0,
-                }
-            # RRF formülü: 1/(k + rank)
-            rrf_scores[pid]["rrf_score"] += 1 / (k + rank)
-            rrf_scores[pid]["scores"][method] = {"rank": rank, "score": score}
-
-    final_results = sorted(rrf_scores.items(), key=lambda x: x[1]["rrf_score"], reverse=True)
-    return final_results
-
 #RRF + Pricelens Entegre Görsel Arama 
-def search_image_with_rrf_pricelens(image_path, kategori, top_n=3, api_mode=False):
+def search_image_with_rrf_pricelens(image, kategori, top_n=3, api_mode=False, image_hash=None, filters=None):
     """
     RRF ile hibrit görsel arama + Pricelens entegrasyonu
+    image: dosya yolu ya da yüklenen byte'lar (API diske yazmadan bellekten verir)
     api_mode: True ise print'leri bastır
+    image_hash: yüklenen byte'ların özeti; verilirse embedding cache kullanılır
+    filters: SearchFilters (fiyat, marka, renk, stoktaki beden); vektör taramasından önce uygulanır
     """
-    image_path = str(image_path)
-    if not Path(image_path).exists():
-        if not api_mode:
-            print(" Görsel bulunamadı.")
-        return [], []
-
+    from_bytes = isinstance(image, (bytes, bytearray, memoryview))
+    if not from_bytes:
+        image = str(image)
+        if not Path(image).exists():
+            if not api_mode:
+                print(" Görsel bulunamadı.")
+            return [], []
 
-    image = Image.open(image_path).convert("RGB")
-    image_tensor = preprocess(image).unsqueeze(0).to(device)
-    with torch.no_grad():
-        image_features = model.encode_image(image_tensor)
-        image_features /= image_features.norm(dim=-1, keepdim=True)
-        query_vector = image_features.squeeze().cpu().numpy()
+    query_vector = encode_image(image, image_hash)
 
     if not api_mode:
-        print(f"\n Görsel araması başlatıldı: {Path(image_path).name} ({kategori})")
+        label = f"{len(image)} byte" if from_bytes else Path(image).name
+        print(f"\n Görsel araması başlatıldı: {label} ({kategori})")
         print(f"Query vektör boyutu: {len(query_vector)}")
 
-    #dükkanlardan sonuçları topla
-    global_results = {"CLIP": [], "COMB": []}
-
-    for dukkan in DUKKANLAR:
-        json_path = Path(BASE_DIR) / dukkan / "backend" / "data" / "product" / f"{kategori}.json"
-        if not json_path.exists():
-            continue
-
-        with json_path.open("r", encoding="utf-8") as f:
-            products = json.load(f)
-
-        if not api_mode:
-            print(f"\n {dukkan} - {len(products)} ürün işleniyor")
-
-
-        results_clip = []
-        results_comb = []
-
-        for item in products:
-            pid = item["id"]
-            name = item.get("name", "Unknown")
-
-            clip_vec = item.get("clip_vector")
-            if clip_vec:
-                sim_clip = cosine_sim(query_vector, clip_vec)
-                results_clip.append((pid, name, sim_clip, item))
-
-
-            comb_vec = item.get("combined_vector")
-            if comb_vec:
-                sim_comb = cosine_sim(query_vector, comb_vec)
-                results_comb.append((pid, name, sim_comb, item))
-
-        # Sırala
-        results_clip.sort(key=lambda x: x[2], reverse=True)
-        results_comb.sort(key=lambda x: x[2], reverse=True)
-
+    # Tüm dükkanlar tek indekste: her yöntem için tek matris-vektör çarpımı
+    index = get_index().category(kategori)
+    if not api_mode:
+        print(f"\n {len(index)} ürün ({', '.join(DUKKANLAR)}) indeksten taranıyor")
 
-        global_results["CLIP"].extend(results_clip[:top_n])
-        global_results["COMB"].extend(results_comb[:top_n])
+    with span("image", "scan"):
+        method_hits = {
+            method: index.top_k(kind, query_vector, top_n, filters=filters)
+            for method, kind in (("CLIP", "clip_vector"), ("COMB", "combined_vector"))
+        }
 
-        # Debug çıktı
-        if not api_mode:
-            if results_clip:
-                best_clip = results_clip[0]
-                print(f"CLIP En İyi: {best_clip[1]} → {best_clip[2]:.4f}")
-            if results_comb:
-                best_comb = results_comb[0]
-                print(f"COMB En İyi: {best_comb[1]} → {best_comb[2]:.4f}")
-
-    # Her yöntemi global olarak tekrar sırala ve kes
-    for method in global_results:
-        global_results[method].sort(key=lambda x: x[2], reverse=True)
-        global_results[method] = global_results[method][:top_n]
+    # Debug çıktı
+    if not api_mode:
+        for method, (rows, scores) in method_hits.items():
+            if len(rows):
+                best = index.index.items[rows[0]]
+                print(f"{method} En İyi: {best.get('name', 'Unknown')} ({best['dukkan']}) → {scores[0]:.4f}")
 
     # RRF uygula
     if not api_mode:
         print(f"\nRRF ile sonuçlar birleştiriliyor...")
-    final_results = reciprocal_rank_fusion(global_results)
+    with span("image", "rrf"):
+        final_results = index.fuse(method_hits)
+    for _, data in final_results:
+        data["name"] = data["item"].get("name", "Unknown")
 
     # RRF sonuçlarını göster
     if not api_mode:
@@ -166,35 +197,19 @@ def search_image_with_rrf_pricelens(image_path, kategori, top_n=3, api_mode=Fals
     if final_results:
 
         best_product_id = final_results[0][0]
+        # "all" aramasında varyantlar kazanan ürünün kendi kategorisinden
+        best_category = final_results[0][1]["item"].get("kategori", kategori)
         if not api_mode:
             print(f"\n Pricelens analizi başlatılıyor - Hedef ürün ID: {best_product_id}")
 
-        # Tüm e-commerce'lerde aynı ürünü ara
-        for dukkan in DUKKANLAR:
-            json_path = Path(BASE_DIR) / dukkan / "backend" / "data" / "product" / f"{kategori}.json"
-            if not json_path.exists():
-                continue
-
-            with json_path.open("r", encoding="utf-8") as f:
-                products = json.load(f)
-
-            for item in products:
-                if item["id"] == best_product_id:
-                    variant = {
-                        "dukkan": dukkan,
-                        "name": item["name"],
-                        "pricelens_score": item.get("pricelens_score", 0),
-                        "price": item.get("price", "Bilinmiyor"),
-                        "rating": item.get("rating", "N/A"),
-                        "image": item["images"][0] if item.get("images") else None,
-                        "item_data": item,
-                    }
-                    product_variants.append(variant)
-                    if not api_mode:
-                        print(
-                            f" {dukkan}: Pricelens {variant['pricelens_score']:.4f} | "
-                            f"Fiyat: {variant['price']} | Rating: {variant['rating']}"
-                        )
+        with span("image", "pricelens"):
+            product_variants = collect_variants(best_product_id, best_category, filters)
+        if not api_mode:
+            for variant in product_variants:
+                print(
+                    f" {variant['dukkan']}: Pricelens {variant['pricelens_score']:.4f} | "
+                    f"Fiyat: {variant['price']} | Rating: {variant['rating']}"
+                )
 
         if product_variants:
             # Pricelens skoruna göre sırala (en yüksekten en düşüğe)
@@ -238,8 +253,8 @@ def search_image_with_rrf_pricelens(image_path, kategori, top_n=3, api_mode=Fals
 
 # === MAIN ===
 if __name__ == "__main__":
-    kategori = input(f"Hangi kategoride arama yapmak istiyorsunuz? ({', '.join(KATEGORILER)}): ").strip().lower()
-    if kategori not in KATEGORILER:
+    kategori = input(f"Hangi kategoride arama yapmak istiyorsunuz? ({', '.join(KATEGORILER)}, {ALL_CATEGORIES}): ").strip().lower()
+    if kategori not in KATEGORILER + [ALL_CATEGORIES]:
         print("Geçersiz kategori.")
         raise SystemExit(1)
 
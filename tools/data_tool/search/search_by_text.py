@@ -1,87 +1,181 @@
 # tools/data_tool/search/search_by_text.py
 
-import os
-import json
+import threading
 from pathlib import Path
 
-import torch
 import numpy as np
-from PIL import Image
-from sentence_transformers import SentenceTransformer
-import open_clip
-import matplotlib.pyplot as plt
 
 # Config 
 from config.config_loader import get_config
+from tools.data_tool.model_registry import get_clip, get_device, get_sentence_model, model_id
+from tools.data_tool.search.batching import MicroBatcher
+from tools.data_tool.search.embedding_cache import EmbeddingCache
+from tools.data_tool.search.metrics import span
+from tools.data_tool.search.pricelens import collect_variants
+from tools.data_tool.search.vector_index import ALL_CATEGORIES, get_index
+from tools.data_tool.text_utils import normalize_text
 _cfg = get_config()
 
 BASE_DIR = _cfg.get_absolute_path("dukkans")               
 DUKKANLAR = list(_cfg.get_shops().keys())                 
 KATEGORILER = list(_cfg.get_categories().keys())         
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
-st_model = SentenceTransformer("all-MiniLM-L6-v2")
-clip_model, _, clip_preprocess = open_clip.create_model_and_transforms("ViT-B-32", pretrained="laion2b_s34b_b79k")
-tokenizer = open_clip.get_tokenizer("ViT-B-32")
-clip_model = clip_model.to(device).eval()
+# Sorgu embedding cache'i: anahtar = model kimliği + normalize sorgu
+QUERY_MODEL_ID = f"{model_id('text_st')}|{model_id('text_clip')}"
+_qc_cfg = _cfg.get_search_config().get("query_cache", {}) or {}
+query_cache = None
+if _qc_cfg.get("enabled", True):
+    _persist = _qc_cfg.get("persist_path")
+    query_cache = EmbeddingCache(
+        max_size=_qc_cfg.get("max_size", 10000),
+        ttl_seconds=_qc_cfg.get("ttl_seconds", 0),
+        persist_path=_cfg.get_absolute_path(_persist) if _persist else None,
+    )
 
 
-def cosine_sim(a, b):
+def encode_queries(queries):
     """
-    Normalize edilmiş vektörler için optimize edildi
+    Sorgu listesini tek forward pass ile kodlar (MiniLM + CLIP text).
+    [(st_vec, clip_vec), ...] döndürür; vektörler normalize float32.
     """
-    a, b = np.array(a), np.array(b)
-    return float(np.dot(a, b))
+    # torch ve modeller ilk sorguda (ya da API warm-up'ında) yüklenir
+    import torch
 
-def vectorize_query(query):
+    queries = list(queries)
+    st_vecs = get_sentence_model("text_st").encode(queries, normalize_embeddings=True, convert_to_numpy=True)
 
-    query_st = st_model.encode(query, normalize_embeddings=True)
+    clip = get_clip("text_clip")
+    with torch.no_grad():
+        tokens = clip.tokenizer(queries).to(get_device())
+        clip_vecs = clip.model.encode_text(tokens).float().cpu().numpy()
+        clip_vecs /= np.linalg.norm(clip_vecs, axis=1, keepdims=True)
 
+    return list(zip(st_vecs.astype(np.float32), clip_vecs.astype(np.float32)))
 
-    with torch.no_grad():
-        tokens = tokenizer([query]).to(device)
-        query_clip = clip_model.encode_text(tokens).float().cpu().numpy()
-        query_clip /= np.linalg.norm(query_clip, axis=1, keepdims=True)
 
-    query_clip_flat = query_clip[0].astype(np.float32)
+# Toplu arama (search_batch_with_rrf_pricelens) ayarları
+_batch_cfg = _cfg.get_search_config().get("batch", {}) or {}
+BATCH_ENCODE_SIZE = int(_batch_cfg.get("encode_batch_size", 64))
+
+# Eşzamanlı sorguları kısa bir pencerede toplayıp tek batch'te kodlayan katman
+_tb_cfg = (_cfg.get_search_config().get("batching", {}) or {}).get("text", {}) or {}
+text_batcher = None
+if _tb_cfg.get("enabled", True):
+    text_batcher = MicroBatcher(
+        encode_queries,
+        max_batch_size=_tb_cfg.get("max_batch_size", 32),
+        max_wait_ms=_tb_cfg.get("max_wait_ms", 3),
+        name="text-encode-batcher",
+    )
+
+
+def vectorize_query(query):
+    cache_key = f"{QUERY_MODEL_ID}|{normalize_text(query)}"
+    if query_cache is not None:
+        cached = query_cache.get(cache_key)
+        if cached is not None:
+            query_st, query_clip = cached
+            return query_st, query_clip, query_clip
+
+    if text_batcher is not None:
+        query_st, query_clip_flat = text_batcher(query)
+    else:
+        query_st, query_clip_flat = encode_queries([query])[0]
+
+    if query_cache is not None:
+        query_cache.put(cache_key, (query_st, query_clip_flat))
     query_comb = query_clip_flat
 
-    return query_st.astype(np.float32), query_clip_flat, query_comb
+    return query_st, query_clip_flat, query_comb
 
 
-# === RRF algoritması ===
-def reciprocal_rank_fusion(results_dict, k=60):
+def vectorize_queries(queries):
     """
-    RRF algoritması - farklı arama yöntemlerini akıllıca birleştir
+    Toplu iş için vectorize_query: cache'te olmayan sorgular encode_batch_size'lık
+    parçalarla doğrudan kodlanır (micro-batcher beklemesi olmadan).
+    (st_matrix, clip_matrix) döndürür; satırlar sorgu sırasında.
     """
-    rrf_scores = {}
-    for method, results in results_dict.items():
-        for rank, (pid, score, item) in enumerate(results, 1):
-            if pid not in rrf_scores:
-                rrf_scores[pid] = {"item": item, "scores": {}, "rrf_score": 0.0}
-            rrf_scores[pid]["rrf_score"] += 1 / (k + rank)  # 1/(k+rank)
-            rrf_scores[pid]["scores"][method] = {"rank": rank, "score": score}
-
-    final_results = sorted(rrf_scores.items(), key=lambda x: x[1]["rrf_score"], reverse=True)
-    return final_results
-
-def get_top_n(data, vector_key, query_vector, top_n=2):
+    keys = [f"{QUERY_MODEL_ID}|{normalize_text(q)}" for q in queries]
+    vectors = [query_cache.get(k) if query_cache is not None else None for k in keys]
+
+    missing = {}
+    for i, (key, vec) in enumerate(zip(keys, vectors)):
+        if vec is None:
+            missing.setdefault(key, []).append(i)
+    miss_keys = list(missing)
+    for start in range(0, len(miss_keys), BATCH_ENCODE_SIZE):
+        chunk = miss_keys[start:start + BATCH_ENCODE_SIZE]
+        encoded = encode_queries([queries[missing[k][0]] for k in chunk])
+        for key, vec in zip(chunk, encoded):
+            if query_cache is not None:
+                query_cache.put(key, vec)
+            for i in missing[key]:
+                vectors[i] = vec
+
+    st = np.stack([v[0] for v in vectors]).astype(np.float32)
+    clip = np.stack([v[1] for v in vectors]).astype(np.float32)
+    return st, clip
+
+
+# Kademeli arama: birebir / güvenli anahtar kelime eşleşmesinde encoder'lar hiç çalışmaz
+_cascade_cfg = _cfg.get_search_config().get("cascade", {}) or {}
+# Arama executor thread'lerinden artırılır: okuma/yazma kilitle
+_cascade_stats = {"lexical": 0, "hybrid": 0}
+_cascade_lock = threading.Lock()
+
+
+def _count_cascade(lexical=0, hybrid=0):
+    with _cascade_lock:
+        _cascade_stats["lexical"] += lexical
+        _cascade_stats["hybrid"] += hybrid
+
+
+def cascade_counts():
+    """Kademe yollarının (lexical / hybrid) sayaçlarının tutarlı kopyası."""
+    with _cascade_lock:
+        return dict(_cascade_stats)
+
+
+def lexical_shortcut(index, query, top_n, filters=None):
     """
-    Cosine similarity ile en iyi N sonucu getir
+    Sorgu tek bir ürünün adı / "marka model"iyle birebir eşleşiyorsa ya da BM25'te
+    en iyi ürün ikinciden config'teki oran kadar öndeyse kısa yol olarak sadece BM25 listesi döner.
+    (kısa yol ya da None, BM25 top_n sonuçları) döndürür: kısa yol yoksa tam hibrit arama BM25'i
+    yeniden hesaplamadan RRF'e katar (kademe kapalıysa ikisi de None).
     """
-    scores = []
-    for item in data:
-        vec = item.get(vector_key)
-        if vec:
-            score = cosine_sim(query_vector, vec)
-            scores.append((item["id"], score, item))
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return scores[:top_n]
+    if not _cascade_cfg.get("enabled", True):
+        return None, None
+
+    rows, scores = index.top_k_lexical(query, max(top_n, 16), filters=filters)
+    bm25 = (rows[:top_n], scores[:top_n])
+    if not len(rows):
+        return None, bm25
+    keys = index.index.product_keys
+
+    # Birebir eşleşme: tek ürün (dükkan kopyaları hariç) ve BM25'te de birinci
+    if _cascade_cfg.get("exact_match", True):
+        exact = index.exact_rows(query, filters=filters)
+        if len(exact) and len(np.unique(keys[exact])) == 1 and keys[rows[0]] == keys[exact[0]]:
+            return {"BM25": bm25}, bm25
+
+    # Güven marjı: en iyi ürün skoru min_score üstünde ve ikinci üründen margin kat fazla
+    top_score = float(scores[0])
+    if top_score < float(_cascade_cfg.get("min_score", 8.0)):
+        return None, bm25
+    others = scores[keys[rows] != keys[rows[0]]]
+    runner_up = float(others[0]) if len(others) else 0.0
+    if top_score >= float(_cascade_cfg.get("margin", 1.5)) * runner_up:
+        return {"BM25": bm25}, bm25
+    return None, bm25
+
 
 def show_image(img_path, title="Ürün"):
     """
     Ürün görselini göster - API modunda çalışmaz
     """
+    import matplotlib.pyplot as plt
+    from PIL import Image
+
     p = Path(img_path)
     if p.exists():
         img = Image.open(p)
@@ -90,56 +184,52 @@ def show_image(img_path, title="Ürün"):
         plt.axis("off")
         plt.show()
 
-def search_with_rrf_pricelens(query, kategori_sec, top_n=3, api_mode=False):
+def search_with_rrf_pricelens(query, kategori_sec, top_n=3, api_mode=False, filters=None):
     """
     RRF ile hibrit arama + Pricelens entegrasyonu
     api_mode: True ise print'leri bastır
+    filters: SearchFilters (fiyat, marka, renk, stoktaki beden); vektör taramasından önce uygulanır
     """
-    # Query vektörlerini oluştur
-    query_st, query_clip, query_comb = vectorize_query(query)
-
+    # Tüm dükkanlar tek indekste: her yöntem için tek matris-vektör çarpımı
+    index = get_index().category(kategori_sec)
     if not api_mode:
         print(f"\n Hibrit arama başlatıldı: '{query}' ({kategori_sec})")
-        print(f" Vektör boyutları: ST={len(query_st)}, CLIP={len(query_clip)}, COMB={len(query_comb)}")
-
-
-    global_results = {"ST": [], "CLIP": [], "COMB": []}
-
-    for dukkan in DUKKANLAR:
-        json_path = Path(BASE_DIR) / dukkan / "backend" / "data" / "product" / f"{kategori_sec}.json"
-        if not json_path.exists():
-            continue
-
-        with json_path.open("r", encoding="utf-8") as f:
-            items = json.load(f)
+        print(f"\n🏪 {len(index)} ürün ({', '.join(DUKKANLAR)}) indeksten taranıyor")
 
+    with span("text", "lexical"):
+        method_hits, bm25 = lexical_shortcut(index, query, top_n, filters)
+    if method_hits is not None:
+        _count_cascade(lexical=1)
         if not api_mode:
-            print(f"\n🏪 {dukkan} - {len(items)} ürün işleniyor")
-
- 
-        st_results = get_top_n(items, "text_vector_st", query_st, top_n)
-        clip_results = get_top_n(items, "text_vector_clip", query_clip, top_n)
-        comb_results = get_top_n(items, "combined_vector", query_comb, top_n)
-
-        global_results["ST"].extend(st_results)
-        global_results["CLIP"].extend(clip_results)
-        global_results["COMB"].extend(comb_results)
-
+            print(" Anahtar kelime eşleşmesi güvenli: encoder'lar atlandı (BM25)")
+    else:
+        _count_cascade(hybrid=1)
+        # Query vektörlerini oluştur
+        with span("text", "encode"):
+            query_st, query_clip, query_comb = vectorize_query(query)
         if not api_mode:
-            for method, results in [(" ST", st_results), ("CLIP", clip_results), (" COMB", comb_results)]:
-                if results:
-                    best = results[0]
-                    print(f"  {method}: {best[2]['name']} → {best[1]:.4f}")
+            print(f" Vektör boyutları: ST={len(query_st)}, CLIP={len(query_clip)}, COMB={len(query_comb)}")
+
+        with span("text", "scan"):
+            method_hits = {
+                "ST": index.top_k("text_vector_st", query_st, top_n, filters=filters),
+                "CLIP": index.top_k("text_vector_clip", query_clip, top_n, filters=filters),
+                "COMB": index.top_k("combined_vector", query_comb, top_n, filters=filters),
+                # Anahtar kelime / model kodu eşleşmesi (BM25; kademe kontrolünde hesaplandıysa tekrar edilmez)
+                "BM25": bm25 if bm25 is not None else index.top_k_lexical(query, top_n, filters=filters),
+            }
 
-    # Her yöntemi global olarak tekrar sırala
-    for method in global_results:
-        global_results[method].sort(key=lambda x: x[1], reverse=True)
-        global_results[method] = global_results[method][:top_n]
+    if not api_mode:
+        for method, (rows, scores) in method_hits.items():
+            if len(rows):
+                best = index.index.items[rows[0]]
+                print(f"  {method}: {best['name']} ({best['dukkan']}) → {scores[0]:.4f}")
 
     # RRF uygula
     if not api_mode:
         print(f"\n RRF ile sonuçlar birleştiriliyor...")
-    final_results = reciprocal_rank_fusion(global_results)
+    with span("text", "rrf"):
+        final_results = index.fuse(method_hits)
 
     # RRF sonuçlarını göster
     if not api_mode:
@@ -157,35 +247,19 @@ def search_with_rrf_pricelens(query, kategori_sec, top_n=3, api_mode=False):
     product_variants = []
     if final_results:
         best_product_id = final_results[0][0]
+        # "all" aramasında varyantlar kazanan ürünün kendi kategorisinden
+        best_category = final_results[0][1]["item"].get("kategori", kategori_sec)
         if not api_mode:
             print(f"\n Pricelens analizi başlatılıyor - Hedef ürün ID: {best_product_id}")
 
-        # Tüm e-commerce'lerde aynı ürünü ara
-        for dukkan in DUKKANLAR:
-            json_path = Path(BASE_DIR) / dukkan / "backend" / "data" / "product" / f"{kategori_sec}.json"
-            if not json_path.exists():
-                continue
-
-            with json_path.open("r", encoding="utf-8") as f:
-                items = json.load(f)
-
-            for item in items:
-                if item["id"] == best_product_id:
-                    variant = {
-                        "dukkan": dukkan,
-                        "name": item["name"],
-                        "pricelens_score": item.get("pricelens_score", 0),
-                        "price": item.get("price", "Bilinmiyor"),
-                        "rating": item.get("rating", "N/A"),
-                        "image": item["images"][0] if item.get("images") else None,
-                        "item_data": item,
-                    }
-                    product_variants.append(variant)
-                    if not api_mode:
-                        print(
-                            f"{dukkan}: Pricelens {variant['pricelens_score']:.2f} | "
-                            f"Fiyat: {variant['price']} | Rating: {variant['rating']}"
-                        )
+        with span("text", "pricelens"):
+            product_variants = collect_variants(best_product_id, best_category, filters)
+        if not api_mode:
+            for variant in product_variants:
+                print(
+                    f"{variant['dukkan']}: Pricelens {variant['pricelens_score']:.2f} | "
+                    f"Fiyat: {variant['price']} | Rating: {variant['rating']}"
+                )
 
         if product_variants:
             product_variants.sort(key=lambda x: x["pricelens_score"], reverse=True)
@@ -224,9 +298,57 @@ def search_with_rrf_pricelens(query, kategori_sec, top_n=3, api_mode=False):
 
     return final_results, product_variants
 
+def search_batch_with_rrf_pricelens(queries, kategori_sec, top_n=3, filters=None):
+    """
+    Çok sayıda sorgu için search_with_rrf_pricelens: sorgular toplu kodlanır, her yöntem
+    için (sorgu matrisi × katalog matrisi) tek taramada skorlanır.
+    Sorgu başına (final_results, product_variants) listesi döndürür (api_mode davranışı).
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+
+    index = get_index().category(kategori_sec)
+    with span("text_batch", "lexical"):
+        shortcuts, bm25 = zip(*[lexical_shortcut(index, q, top_n, filters) for q in queries])
+    pending = [i for i, hits in enumerate(shortcuts) if hits is None]
+    _count_cascade(lexical=len(queries) - len(pending), hybrid=len(pending))
+
+    # Sadece kısa yoldan dönemeyen sorgular kodlanıp taranır
+    per_query = list(shortcuts)
+    if pending:
+        pending_queries = [queries[i] for i in pending]
+        with span("text_batch", "encode"):
+            st, clip = vectorize_queries(pending_queries)
+        with span("text_batch", "scan"):
+            per_method = {
+                "ST": index.top_k_batch("text_vector_st", st, top_n, filters=filters),
+                "CLIP": index.top_k_batch("text_vector_clip", clip, top_n, filters=filters),
+                "COMB": index.top_k_batch("combined_vector", clip, top_n, filters=filters),
+                "BM25": [bm25[i] if bm25[i] is not None else index.top_k_lexical(queries[i], top_n, filters=filters)
+                         for i in pending],
+            }
+        for j, i in enumerate(pending):
+            per_query[i] = {method: hits[j] for method, hits in per_method.items()}
+
+    with span("text_batch", "rrf"):
+        fused = [index.fuse(hits) for hits in per_query]
+
+    out = []
+    with span("text_batch", "pricelens"):
+        for final_results in fused:
+            product_variants = []
+            if final_results:
+                best_id, best_data = final_results[0]
+                best_category = best_data["item"].get("kategori", kategori_sec)
+                product_variants = collect_variants(best_id, best_category, filters)
+                product_variants.sort(key=lambda x: x["pricelens_score"], reverse=True)
+            out.append((final_results, product_variants))
+    return out
+
 if __name__ == "__main__":
-    kategori_sec = input(f" Hangi kategoride arama yapmak istersiniz? ({', '.join(KATEGORILER)}): ").strip().lower()
-    if kategori_sec not in KATEGORILER:
+    kategori_sec = input(f" Hangi kategoride arama yapmak istersiniz? ({', '.join(KATEGORILER)}, {ALL_CATEGORIES}): ").strip().lower()
+    if kategori_sec not in KATEGORILER + [ALL_CATEGORIES]:
         print(" Geçersiz kategori.")
         raise SystemExit(1)
 
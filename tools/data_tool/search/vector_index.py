@@ -0,0 +1,792 @@
+# tools/data_tool/search/vector_index.py
+
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config.config_loader import get_config
+from tools.data_tool.catalog import get_catalog
+from tools.data_tool.search.ann import ann_config, attach_ann
+from tools.data_tool.search.filters import FilterColumns, SearchFilters
+from tools.data_tool.search.fusion import fusion_results
+from tools.data_tool.search.index_store import is_mapped, share_matrices
+from tools.data_tool.search.lexical import BM25Index, build_lexical
+from tools.data_tool.search.quantize import attach_quantizers, quantization_config, rescore_matrices
+from tools.data_tool.vector_store import VECTOR_KINDS, VectorShard, load_vectors
+
+logger = logging.getLogger(__name__)
+
+_cfg = get_config()
+
+DUKKANLAR = list(_cfg.get_shops().keys())
+KATEGORILER = list(_cfg.get_categories().keys())
+
+# Tüm kategorilerde tek geçişte arama için kategori adı
+ALL_CATEGORIES = "all"
+
+
+class CategoryIndex:
+    """
+    Bir ya da daha fazla kategorideki tüm dükkanların ürünlerini tek bir indekste tutar.
+    Her vektör türü için (satır = ürün) float32 matris + geçerlilik maskesi,
+    yanında paralel id / dükkan / kategori kodu / ürün (vektörsüz) dizileri.
+    """
+
+    def __init__(self, category: str, ids: List[str], shops: List[str], items: List[dict],
+                 matrices: Dict[str, np.ndarray], valid: Dict[str, np.ndarray],
+                 ann: Optional[Dict[str, object]] = None, rerank_factor: int = 4,
+                 quant: Optional[Dict[str, object]] = None, quant_rerank_factor: int = 8,
+                 categories: Optional[List[str]] = None, codes: Optional[np.ndarray] = None,
+                 lexical: Optional[BM25Index] = None):
+        self.category = category
+        self.ids = np.asarray(ids, dtype=object)
+        self.shops = np.asarray(shops, dtype=object)
+        # Aynı ürünün dükkan satırları aynı kodu alır (RRF birleştirme anahtarı)
+        self.product_keys = np.unique(np.asarray(ids, dtype=str), return_inverse=True)[1].astype(np.int64).ravel()
+        self.items = items  # katalog kayıtları (paylaşılan; değiştirilmez)
+        self.matrices = matrices
+        self.valid = valid
+        self.ann = ann or {}
+        self.quant = quant or {}
+        self.quant_rerank_factor = max(1, int(quant_rerank_factor))
+        self.categories = list(categories or [category])
+        self.codes = np.zeros(len(items), dtype=np.int16) if codes is None else np.asarray(codes, dtype=np.int16)
+        self._masks = {cat: self.codes == code for code, cat in enumerate(self.categories)}
+        # Fiyat / marka / renk / stoktaki beden filtreleri için satırlarla hizalı sütunlar
+        self.columns = FilterColumns(items)
+        # Ad/marka/model/açıklama/etiketler üzerinde BM25 (kapalıysa None)
+        self.lexical = lexical
+        self.rerank_factor = max(1, int(rerank_factor))
+        # Delta güncellemeleri için tembel kurulan yardımcı eşlemeler
+        self._key_map: Optional[Dict[str, int]] = None
+        self._shop_rows: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def keys_for(self, ids: Iterable[str]) -> np.ndarray:
+        """Başka bir segmentin id'leri için bu indeksle tutarlı ürün kodları (indekste olmayan id → yeni kod)."""
+        if self._key_map is None:
+            self._key_map = dict(zip(self.ids.tolist(), self.product_keys.tolist()))
+        base = int(self.product_keys.max()) + 1 if len(self.product_keys) else 0
+        extra: Dict[str, int] = {}
+        return np.asarray([
+            self._key_map[pid] if pid in self._key_map else extra.setdefault(pid, base + len(extra))
+            for pid in ids
+        ], dtype=np.int64)
+
+    def shop_rows(self, dukkan: str, kategori: str) -> np.ndarray:
+        """Bir dükkanın kategori satırları (ilk çağrıda hesaplanıp saklanır)."""
+        key = (dukkan, kategori)
+        if key not in self._shop_rows:
+            if kategori not in self.categories:
+                self._shop_rows[key] = np.empty(0, dtype=np.int64)
+            else:
+                code = self.categories.index(kategori)
+                self._shop_rows[key] = np.flatnonzero((self.codes == code) & (self.shops == dukkan))
+        return self._shop_rows[key]
+
+    def category_mask(self, kategori: Optional[str]) -> Optional[np.ndarray]:
+        """Kategori satırları için boolean maske; tüm indeks isteniyorsa None."""
+        if kategori in (None, ALL_CATEGORIES) or self.categories == [kategori]:
+            return None
+        if kategori not in self._masks:
+            raise KeyError(f"İndekste olmayan kategori: {kategori}")
+        return self._masks[kategori]
+
+    def row_mask(self, kategori: Optional[str] = None,
+                 filters: Optional[SearchFilters] = None) -> Optional[np.ndarray]:
+        """Kategori ve yapısal filtrelerin birleşik maskesi (kısıt yoksa None)."""
+        mask = self.category_mask(kategori)
+        filter_mask = self.columns.mask(filters)
+        if filter_mask is None:
+            return mask
+        return filter_mask if mask is None else mask & filter_mask
+
+    def top_k(self, kind: str, query_vector, top_n: int, exact: bool = False,
+              mask: Optional[np.ndarray] = None, kategori: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tek matris-vektör çarpımı + argpartition ile en iyi top_n satırı döndürür.
+        Vektörler normalize olduğu için nokta çarpım = cosine similarity.
+        Tür için ANN varsa (ve exact değilse) sadece adaylar taranır (kategori verilirse o kategorinin
+        bölümünden); kuantize kod varsa kaba tarama int8/PQ kodlarıyla yapılır. Her iki durumda adaylar
+        float ile yeniden skorlanır. mask kategori kısıtını da içermelidir (row_mask).
+        """
+        mat = self.matrices.get(kind)
+        if mat is None or top_n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        q = np.asarray(query_vector, dtype=np.float32).ravel()
+        if q.shape[0] != mat.shape[1]:
+            logger.warning(f"{self.category}/{kind}: sorgu boyutu {q.shape[0]} != indeks boyutu {mat.shape[1]}")
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        valid = self.valid[kind] if mask is None else self.valid[kind] & mask
+        ann = None if exact else self.ann.get(kind)
+        if ann is not None:
+            partition = None if kategori in (None, ALL_CATEGORIES) else kategori
+            cand = ann.candidates(q, top_n * self.rerank_factor, partition=partition)
+            cand = np.unique(cand[valid[cand]])
+            if len(cand) >= top_n:
+                return self._rescore(mat, q, cand, top_n)
+            # Aday sayısı yetersiz → tam tarama
+
+        quant = None if exact else self.quant.get(kind)
+        if quant is not None:
+            return self._quant_top_k(mat, q, quant.scores(q), valid, top_n)
+
+        scores = mat @ q
+        scores = np.where(valid, scores, -np.inf)
+
+        n = min(top_n, int(valid.sum()))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if n < len(scores):
+            rows = np.argpartition(-scores, n - 1)[:n]
+        else:
+            rows = np.flatnonzero(valid)
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows].astype(np.float32)
+
+    def top_k_batch(self, kind: str, query_matrix, top_n: int, mask: Optional[np.ndarray] = None,
+                    query_block: int = 256) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Çok sayıda sorgu için tam tarama: (B, D) sorgu matrisi × katalog matrisi tek çarpımda
+        (bellek için query_block'luk parçalar halinde). Sorgu başına (satırlar, skorlar) döndürür.
+        """
+        mat = self.matrices.get(kind)
+        Q = np.asarray(query_matrix, dtype=np.float32)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        if mat is None or top_n <= 0 or Q.ndim != 2 or not len(Q):
+            return [empty] * (len(Q) if Q.ndim == 2 else 0)
+        if Q.shape[1] != mat.shape[1]:
+            logger.warning(f"{self.category}/{kind}: sorgu boyutu {Q.shape[1]} != indeks boyutu {mat.shape[1]}")
+            return [empty] * len(Q)
+
+        valid = self.valid[kind] if mask is None else self.valid[kind] & mask
+        n = min(top_n, int(valid.sum()))
+        if n <= 0:
+            return [empty] * len(Q)
+
+        out = []
+        quant = self.quant.get(kind)
+        if quant is not None:
+            # Float matris taranmaz (diskten eşli): kaba skorlar kodlardan, adaylar tek tek yeniden skorlanır
+            for start in range(0, len(Q), query_block):
+                block = Q[start:start + query_block]
+                coarse = quant.scores_batch(block)
+                out.extend(self._quant_top_k(mat, q, coarse[:, j], valid, top_n) for j, q in enumerate(block))
+            return out
+
+        for start in range(0, len(Q), query_block):
+            scores = Q[start:start + query_block] @ mat.T
+            scores = np.where(valid[None, :], scores, -np.inf).astype(np.float32, copy=False)
+            if n < scores.shape[1]:
+                rows = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+            else:
+                rows = np.tile(np.flatnonzero(valid), (len(scores), 1))
+            top = np.take_along_axis(scores, rows, axis=1)
+            order = np.argsort(-top, axis=1, kind="stable")
+            rows = np.take_along_axis(rows, order, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            out.extend(zip(rows, top))
+        return out
+
+    def top_k_lexical(self, query: str, top_n: int,
+                      mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 ile en iyi top_n satır; lexical indeks yoksa boş."""
+        if self.lexical is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self.lexical.top_k(query, top_n, mask=mask)
+
+    def exact_rows(self, query: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Adı ya da "marka model"i sorguyla birebir eşleşen satırlar."""
+        if self.lexical is None:
+            return np.empty(0, dtype=np.int64)
+        rows = self.lexical.exact_rows(query)
+        return rows if mask is None else rows[mask[rows]]
+
+    def _quant_top_k(self, mat: np.ndarray, q: np.ndarray, coarse: np.ndarray, valid: np.ndarray, top_n: int):
+        """Kuantize kaba skorlardan top_n * quant_rerank_factor aday seçip float matrisle yeniden skorlar."""
+        scores = np.where(valid, coarse, -np.inf)
+        n = min(top_n * self.quant_rerank_factor, int(valid.sum()))
+        if n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        cand = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.flatnonzero(valid)
+        return self._rescore(mat, q, cand, top_n)
+
+    @staticmethod
+    def _rescore(mat: np.ndarray, q: np.ndarray, cand: np.ndarray, top_n: int):
+        """Aday satırları tam (float) vektörlerle skorlayıp en iyi top_n'i sıralı döndürür."""
+        cand_scores = mat[cand].astype(np.float32) @ q
+        n = min(top_n, len(cand))
+        order = np.argpartition(-cand_scores, n - 1)[:n] if n < len(cand) else np.arange(len(cand))
+        order = order[np.argsort(-cand_scores[order], kind="stable")]
+        return cand[order], cand_scores[order]
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """
+        Tür başına bellekte sürekli tutulan bayt: her sorguda tamamı taranan float matris (paylaşımlı
+        mmap olsa da sayfaları sürekli okunur) ya da kuantize türlerde kodlar. Kuantize türün diskten
+        eşlenen yeniden skorlama matrisi sayılmaz (mapped_bytes); eşlenemediyse bellekte sayılır.
+        """
+        out = {}
+        for kind, mat in self.matrices.items():
+            quant = self.quant.get(kind)
+            if quant is None:
+                out[kind] = mat.nbytes
+            else:
+                out[kind] = quant.nbytes + (0 if is_mapped(mat) else mat.nbytes)
+        return out
+
+    def mapped_bytes(self) -> Dict[str, int]:
+        """Kuantize türlerin diskten eşlenen yeniden skorlama matrisleri (sadece aday satır sayfaları okunur)."""
+        return {kind: self.matrices[kind].nbytes for kind in self.quant
+                if kind in self.matrices and is_mapped(self.matrices[kind])}
+
+    def search(self, kind: str, query_vector, top_n: int, kategori: Optional[str] = None,
+               filters: Optional[SearchFilters] = None) -> List[tuple]:
+        """
+        get_top_n ile aynı formatta (pid, score, item) listesi döndürür.
+        Filtreler top-k seçiminden önce maske olarak uygulanır; eşleşen ürün varsa liste kısalmaz.
+        """
+        rows, scores = self.top_k(kind, query_vector, top_n, mask=self.row_mask(kategori, filters), kategori=kategori)
+        return [(self.ids[r], float(s), self.items[r]) for r, s in zip(rows, scores)]
+
+
+    def search_batch(self, kind: str, query_matrix, top_n: int, kategori: Optional[str] = None,
+                     filters: Optional[SearchFilters] = None) -> List[List[tuple]]:
+        """search() ile aynı format, sorgu başına bir liste."""
+        mask = self.row_mask(kategori, filters)
+        return [
+            [(self.ids[r], float(sc), self.items[r]) for r, sc in zip(rows, scores)]
+            for rows, scores in self.top_k_batch(kind, query_matrix, top_n, mask=mask)
+        ]
+
+
+def _stack(label: str, rows: List[Optional[list]]):
+    """Vektör listelerini tek float32 matrise dizer; eksik/uyumsuz satırlar geçersiz sayılır."""
+    dim = next((len(v) for v in rows if v), 0)
+    mat = np.zeros((len(rows), dim), dtype=np.float32)
+    valid = np.zeros(len(rows), dtype=bool)
+    for i, vec in enumerate(rows):
+        if not vec:
+            continue
+        if len(vec) != dim:
+            logger.warning(f"{label}: satır {i} boyutu {len(vec)} != {dim}, atlanıyor")
+            continue
+        mat[i] = vec
+        valid[i] = True
+    return mat, valid
+
+
+def _shard_block(shard: VectorShard, kind: str, ids: List[str]):
+    """Sidecar matrisinden JSON sırasına göre satırları alır (id eşleşmesiyle)."""
+    src = shard.matrices[kind]
+    if shard.ids == ids:
+        mat = np.array(src, dtype=np.float32)
+    else:
+        rows = shard.rows_for(ids)
+        mat = np.zeros((len(ids), src.shape[1]), dtype=np.float32)
+        hit = rows >= 0
+        mat[hit] = src[rows[hit]]
+    return mat, np.any(mat != 0, axis=1)
+
+
+def _json_vectors(dukkan: str, kategori: str) -> Dict[str, List[Optional[list]]]:
+    """Sidecar'ın kapsamadığı durumlar için vektörleri ürün JSON'undan okur."""
+    data_dir = _cfg.get_shop_data_path(dukkan)
+    cat_info = _cfg.get_category(kategori)
+    json_path = data_dir / cat_info.get("product_file", f"product/{kategori}.json")
+    if not json_path.exists():
+        return {}
+    with json_path.open("r", encoding="utf-8") as f:
+        products = json.load(f)
+    return {kind: [item.get(kind) or None for item in products] for kind in VECTOR_KINDS}
+
+
+def _load_shop_category(dukkan: str, kategori: str):
+    """
+    Dükkanın kategori kayıtlarını katalogdan alır; (ürünler, {tür: (matris, geçerli maske)}) döndürür.
+    Vektörler sidecar .npy dosyalarından (mmap) okunur; JSON sadece sidecar eksikse açılır.
+    """
+    items = get_catalog().records(dukkan, kategori)
+    if not items:
+        return [], {}
+
+    ids = [item.get("id") for item in items]
+    data_dir = _cfg.get_shop_data_path(dukkan)
+    shard = load_vectors(data_dir, kategori) if data_dir else None
+
+    blocks = {}
+    for kind in VECTOR_KINDS:
+        if shard is not None and shard.matrices.get(kind) is not None and shard.matrices[kind].shape[1]:
+            blocks[kind] = _shard_block(shard, kind, ids)
+
+    missing = [kind for kind in VECTOR_KINDS if kind not in blocks or not blocks[kind][1].all()]
+    json_rows = _json_vectors(dukkan, kategori) if missing else {}
+    if json_rows and len(next(iter(json_rows.values()))) != len(items):
+        # Katalog okunduktan sonra dosya değişmiş; bir sonraki yeniden yüklemede düzelir
+        json_rows = {}
+
+    for kind in missing:
+        rows = json_rows.get(kind) or [None] * len(items)
+        if kind in blocks:
+            mat, valid = blocks[kind]
+            # Sidecar'da olmayıp JSON'da olan (yeni eklenmiş) vektörler
+            for i, vec in enumerate(rows):
+                if not valid[i] and vec and len(vec) == mat.shape[1]:
+                    mat[i] = vec
+                    valid[i] = True
+        else:
+            blocks[kind] = _stack(f"{dukkan}/{kategori}/{kind}", rows)
+
+    return items, blocks
+
+
+def _concat(kategori: str, kind: str, parts: List[tuple]):
+    """Dükkan bloklarını tek matriste birleştirir; boyutu uymayan bloklar geçersiz sayılır."""
+    dim = next((m.shape[1] for m, _ in parts if m.shape[1]), 0)
+    mats, valids = [], []
+    for mat, valid in parts:
+        if mat.shape[1] != dim:
+            if mat.shape[1]:
+                logger.warning(f"{kategori}/{kind}: blok boyutu {mat.shape[1]} != {dim}, atlanıyor")
+            mat = np.zeros((len(valid), dim), dtype=np.float32)
+            valid = np.zeros(len(valid), dtype=bool)
+        mats.append(mat)
+        valids.append(valid)
+    if not mats:
+        return np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=bool)
+    return np.ascontiguousarray(np.concatenate(mats), dtype=np.float32), np.concatenate(valids)
+
+
+def _take_rows(previous: CategoryIndex, rows: np.ndarray):
+    """Önceki indeksten verilen satırları (id, dükkan, kayıtlar + vektör blokları) alır."""
+    items = [previous.items[r] for r in rows]
+    blocks = {
+        kind: (np.asarray(previous.matrices[kind][rows], dtype=np.float32), previous.valid[kind][rows])
+        for kind in VECTOR_KINDS if kind in previous.matrices
+    }
+    return list(previous.ids[rows]), list(previous.shops[rows]), items, blocks
+
+
+def _reuse_category(previous: CategoryIndex, kategori: str):
+    """Önceki indeksten bir kategorinin satırlarını alır."""
+    return _take_rows(previous, np.flatnonzero(previous.codes == previous.categories.index(kategori)))
+
+
+def _build(name: str, categories: List[str], with_ann: bool = True, with_quant: bool = True,
+           previous: Optional[CategoryIndex] = None, changed: Optional[Set[str]] = None) -> CategoryIndex:
+    """
+    Verilen kategorilerdeki tüm dükkanları okuyup tek indeks oluşturur (satır başına kategori kodu).
+    previous + changed verilirse sadece değişen kategoriler diskten okunur, diğerleri önceki indeksten kopyalanır.
+    """
+    ids, shops, items, codes = [], [], [], []
+    parts = {kind: [] for kind in VECTOR_KINDS}
+
+    for code, kategori in enumerate(categories):
+        if previous is not None and changed is not None and kategori not in changed \
+                and kategori in previous.categories:
+            cat_ids, cat_shops, cat_items, cat_blocks = _reuse_category(previous, kategori)
+            ids.extend(cat_ids)
+            shops.extend(cat_shops)
+            items.extend(cat_items)
+            codes.extend([code] * len(cat_items))
+            for kind, block in cat_blocks.items():
+                parts[kind].append(block)
+            continue
+
+        for dukkan in DUKKANLAR:
+            shop_items, shop_blocks = _load_shop_category(dukkan, kategori)
+            for item in shop_items:
+                ids.append(item["id"])
+                shops.append(dukkan)
+                items.append(item)
+            codes.extend([code] * len(shop_items))
+            for kind, block in shop_blocks.items():
+                parts[kind].append(block)
+
+    return _assemble(name, categories, ids, shops, items, codes, parts, with_ann=with_ann, with_quant=with_quant)
+
+
+def _assemble(name: str, categories: List[str], ids: List[str], shops: List[str], items: List[dict],
+              codes: List[int], parts: Dict[str, List[tuple]], with_ann: bool = True, with_quant: bool = True,
+              lexical_reference: Optional[BM25Index] = None, share: bool = True) -> CategoryIndex:
+    """
+    Satır listeleri + tür başına vektör bloklarından indeksi kurar (ANN / kuantizasyon / BM25 dahil).
+    share: matrisler config'teki paylaşımlı (mmap) indeks dizininden eşlenir.
+    """
+    matrices, valid = {}, {}
+    for kind in VECTOR_KINDS:
+        matrices[kind], valid[kind] = _concat(name, kind, parts[kind])
+
+    codes = np.asarray(codes, dtype=np.int16)
+    ann = attach_ann(name, matrices, valid, ids, shops, categories, codes) if with_ann else {}
+    quant = attach_quantizers(name, matrices, valid) if with_quant else {}
+
+    # Kuantize türlerin float matrisi sadece yeniden skorlamada (aday satırlar) okunur: diskten eşlenir,
+    # bellekte kodlar kalır (rescore_dtype: float16 → dosya da yarıya iner)
+    quant_cfg = quantization_config()
+    rescore = rescore_matrices(name, {kind: matrices[kind] for kind in quant}) if quant else {}
+
+    # Tam taranan matrisleri worker süreçleri aynı dosyalardan eşler (search.shared_index)
+    scanned = {kind: mat for kind, mat in matrices.items() if kind not in rescore}
+    if share:
+        scanned = share_matrices(name, scanned)
+    matrices = {kind: rescore[kind] if kind in rescore else scanned[kind] for kind in matrices}
+
+    logger.info(f"İndeks hazır: {name} → {len(items)} ürün, {len(categories)} kategori, {len(DUKKANLAR)} dükkan, "
+                f"ANN: {list(ann)}, kuantize: {list(quant)}")
+    return CategoryIndex(name, ids, shops, items, matrices, valid,
+                         ann=ann, rerank_factor=ann_config().get("rerank_factor", 4),
+                         quant=quant, quant_rerank_factor=quant_cfg.get("rerank_factor", 8),
+                         categories=categories, codes=codes,
+                         lexical=build_lexical(name, items, reference=lexical_reference))
+
+
+def build_category_index(kategori: str, with_ann: bool = True, with_quant: bool = True) -> CategoryIndex:
+    """Kategori için tüm dükkanları okuyup tek indeks oluşturur."""
+    return _build(kategori, [kategori], with_ann=with_ann, with_quant=with_quant)
+
+
+def build_fused_index(categories: Optional[List[str]] = None, with_ann: bool = True,
+                      with_quant: bool = True, previous: Optional[CategoryIndex] = None,
+                      changed: Optional[Set[str]] = None) -> CategoryIndex:
+    """Tüm kategoriler için tek indeks; kategori kısıtı satır maskesiyle yapılır."""
+    return _build(ALL_CATEGORIES, list(categories or KATEGORILER), with_ann=with_ann, with_quant=with_quant,
+                  previous=previous, changed=changed)
+
+
+def _merge_hits(main: Tuple[np.ndarray, np.ndarray], delta: Tuple[np.ndarray, np.ndarray], offset: int,
+                top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Ana indeks ve delta segmentinin (satırlar, skorlar) sonuçlarını tek satır uzayında birleştirir."""
+    if not len(delta[0]):
+        return main
+    rows = np.concatenate([np.asarray(main[0], dtype=np.int64), np.asarray(delta[0], dtype=np.int64) + offset])
+    scores = np.concatenate([main[1], delta[1]]).astype(np.float32, copy=False)
+    order = np.argsort(-scores, kind="stable")[:top_n]
+    return rows[order], scores[order]
+
+
+class CategoryView:
+    """Arama indeksinin bir kategoriye (ya da "all" ile tümüne) kısıtlanmış görünümü."""
+
+    def __init__(self, index: "SearchIndex", kategori: str):
+        self.index = index
+        self.category = kategori
+        self._len = index.count(kategori)
+
+    def __len__(self):
+        return self._len
+
+    def top_k(self, kind: str, query_vector, top_n: int, exact: bool = False,
+              filters: Optional[SearchFilters] = None):
+        return self.index.top_k(kind, query_vector, top_n, exact=exact, kategori=self.category, filters=filters)
+
+    def top_k_batch(self, kind: str, query_matrix, top_n: int, filters: Optional[SearchFilters] = None):
+        return self.index.top_k_batch(kind, query_matrix, top_n, kategori=self.category, filters=filters)
+
+    def top_k_lexical(self, query: str, top_n: int, filters: Optional[SearchFilters] = None):
+        return self.index.top_k_lexical(query, top_n, kategori=self.category, filters=filters)
+
+    def exact_rows(self, query: str, filters: Optional[SearchFilters] = None) -> np.ndarray:
+        return self.index.exact_rows(query, kategori=self.category, filters=filters)
+
+    def search(self, kind: str, query_vector, top_n: int, filters: Optional[SearchFilters] = None) -> List[tuple]:
+        """get_top_n ile aynı formatta (pid, score, item) listesi döndürür."""
+        return self.index.as_tuples(*self.top_k(kind, query_vector, top_n, filters=filters))
+
+    def search_batch(self, kind: str, query_matrix, top_n: int,
+                     filters: Optional[SearchFilters] = None) -> List[List[tuple]]:
+        return [self.index.as_tuples(rows, scores)
+                for rows, scores in self.top_k_batch(kind, query_matrix, top_n, filters=filters)]
+
+    def fuse(self, method_hits: Dict[str, Tuple[np.ndarray, np.ndarray]], limit: Optional[int] = None,
+             k: Optional[float] = None, weights: Optional[Dict[str, float]] = None) -> List[tuple]:
+        """top_k sonuçlarını ({yöntem: (satırlar, skorlar)}) ürün bazında RRF ile birleştirir."""
+        idx = self.index
+        return fusion_results(method_hits, idx.ids, idx.items, idx.product_keys, k=k, weights=weights, limit=limit)
+
+
+_generations = itertools.count(1)
+
+
+class SearchIndex:
+    """
+    Tüm kategorileri tek matriste tutan süreç içi (resident) yapı; kategoriler maske ile seçilir.
+    Tekil ürün değişiklikleri küçük bir delta segmentine eklenir, ana matristeki eski satırları
+    tombstone ile gizlenir; iki segment birlikte aranır. Satır uzayı: önce ana indeks, sonra delta.
+    Nesne değiştirilmez; her güncelleme yeni bir SearchIndex üretir. generation her nesnede artar;
+    sonuç cache'i anahtarı aramayı gerçekten yapan indeks kopyasına bağlamak için kullanır.
+    """
+
+    def __init__(self, fused: CategoryIndex, delta: Optional[CategoryIndex] = None,
+                 tombstones: Optional[np.ndarray] = None, pending: Optional[Iterable[str]] = None,
+                 delta_since: Optional[float] = None):
+        self.generation = next(_generations)
+        self.fused = fused
+        self.delta = delta if delta is not None and len(delta) else None
+        self.tombstones = tombstones if tombstones is not None and tombstones.any() else None
+        # Delta / tombstone içeren kategoriler: birleştirmede diskten yeniden okunur
+        self.pending = frozenset(pending or ())
+        self.delta_since = (delta_since or time.time()) if self.pending else None
+        self.offset = len(fused)
+        self._live = None if self.tombstones is None else ~self.tombstones
+
+        if self.delta is None:
+            self.ids, self.items, self.product_keys = fused.ids, fused.items, fused.product_keys
+        else:
+            self.ids = np.concatenate([fused.ids, self.delta.ids])
+            self.items = fused.items + self.delta.items
+            self.product_keys = np.concatenate([fused.product_keys, fused.keys_for(self.delta.ids.tolist())])
+
+        self._views = {cat: CategoryView(self, cat) for cat in fused.categories + [ALL_CATEGORIES]}
+
+    def category(self, kategori: str) -> CategoryView:
+        return self._views[kategori]
+
+    def row_masks(self, kategori: Optional[str] = None, filters: Optional[SearchFilters] = None):
+        """(ana indeks maskesi, delta maskesi); tombstone'lu satırlar ana maskeden çıkarılır."""
+        main = self.fused.row_mask(kategori, filters)
+        if self._live is not None:
+            main = self._live if main is None else main & self._live
+        delta = self.delta.row_mask(kategori, filters) if self.delta is not None else None
+        return main, delta
+
+    def count(self, kategori: Optional[str] = None) -> int:
+        main, delta = self.row_masks(kategori)
+        n = len(self.fused) if main is None else int(main.sum())
+        if self.delta is not None:
+            n += len(self.delta) if delta is None else int(delta.sum())
+        return n
+
+    def top_k(self, kind: str, query_vector, top_n: int, exact: bool = False, kategori: Optional[str] = None,
+              filters: Optional[SearchFilters] = None) -> Tuple[np.ndarray, np.ndarray]:
+        main_mask, delta_mask = self.row_masks(kategori, filters)
+        hits = self.fused.top_k(kind, query_vector, top_n, exact=exact, mask=main_mask, kategori=kategori)
+        if self.delta is None:
+            return hits
+        # Delta küçük: her zaman tam tarama
+        return _merge_hits(hits, self.delta.top_k(kind, query_vector, top_n, exact=True, mask=delta_mask),
+                           self.offset, top_n)
+
+    def top_k_batch(self, kind: str, query_matrix, top_n: int, kategori: Optional[str] = None,
+                    filters: Optional[SearchFilters] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        main_mask, delta_mask = self.row_masks(kategori, filters)
+        hits = self.fused.top_k_batch(kind, query_matrix, top_n, mask=main_mask)
+        if self.delta is None:
+            return hits
+        delta_hits = self.delta.top_k_batch(kind, query_matrix, top_n, mask=delta_mask)
+        if len(delta_hits) != len(hits):
+            return hits
+        return [_merge_hits(m, d, self.offset, top_n) for m, d in zip(hits, delta_hits)]
+
+    def top_k_lexical(self, query: str, top_n: int, kategori: Optional[str] = None,
+                      filters: Optional[SearchFilters] = None) -> Tuple[np.ndarray, np.ndarray]:
+        main_mask, delta_mask = self.row_masks(kategori, filters)
+        hits = self.fused.top_k_lexical(query, top_n, mask=main_mask)
+        if self.delta is None:
+            return hits
+        return _merge_hits(hits, self.delta.top_k_lexical(query, top_n, mask=delta_mask), self.offset, top_n)
+
+    def exact_rows(self, query: str, kategori: Optional[str] = None,
+                   filters: Optional[SearchFilters] = None) -> np.ndarray:
+        main_mask, delta_mask = self.row_masks(kategori, filters)
+        rows = self.fused.exact_rows(query, mask=main_mask)
+        if self.delta is None:
+            return rows
+        return np.concatenate([rows, self.delta.exact_rows(query, mask=delta_mask) + self.offset])
+
+    def as_tuples(self, rows: np.ndarray, scores: np.ndarray) -> List[tuple]:
+        return [(self.ids[r], float(sc), self.items[r]) for r, sc in zip(rows, scores)]
+
+    def stats(self) -> Dict[str, int]:
+        return {cat: len(view) for cat, view in self._views.items()}
+
+    def delta_stats(self) -> Dict[str, object]:
+        return {
+            "delta_rows": len(self.delta) if self.delta is not None else 0,
+            "tombstones": int(self.tombstones.sum()) if self.tombstones is not None else 0,
+            "pending_categories": sorted(self.pending),
+            "age_seconds": round(time.time() - self.delta_since, 1) if self.delta_since else 0.0,
+        }
+
+
+def delta_config() -> Dict:
+    return _cfg.get_search_config().get("delta", {}) or {}
+
+
+def _same_row(index: CategoryIndex, row: int, item: dict, blocks: Dict[str, tuple], i: int) -> bool:
+    """Kayıt ve vektörler indeksteki satırla aynı mı (float16 yeniden skorlama matrisleri için toleranslı)."""
+    if index.items[row] != item:
+        return False
+    for kind, (mat, valid) in blocks.items():
+        if kind not in index.matrices or bool(index.valid[kind][row]) != bool(valid[i]):
+            return False
+        if valid[i]:
+            old = index.matrices[kind][row]
+            if old.shape[0] != mat.shape[1] or not np.allclose(old.astype(np.float32), mat[i], atol=1e-3):
+                return False
+    return True
+
+
+def _apply_changes(current: SearchIndex, changed: Iterable[Tuple[str, str]]) -> Optional[SearchIndex]:
+    """
+    Değişen (dükkan, kategori) dosyalarını mevcut indekse delta olarak uygular.
+    Yeni / değişen ürünler deltaya eklenir, eski satırları tombstone'lanır (delta'daysa düşürülür),
+    dosyadan silinen ürünler de tombstone'lanır. Değişiklik yoksa None.
+    """
+    fused, delta = current.fused, current.delta
+    tombstones = current.tombstones.copy() if current.tombstones is not None else np.zeros(len(fused), dtype=bool)
+    drop = np.zeros(len(delta) if delta is not None else 0, dtype=bool)
+    added = []  # (dükkan, kategori kodu, kayıt, {tür: (1xD matris, maske)})
+    touched: Set[str] = set()
+
+    def retire(segment, row):
+        if segment is fused:
+            tombstones[row] = True
+        else:
+            drop[row] = True
+
+    for dukkan, kategori in changed:
+        if kategori not in fused.categories:
+            continue
+        items, blocks = _load_shop_category(dukkan, kategori)
+
+        live: Dict[str, Tuple[CategoryIndex, int]] = {}
+        for row in fused.shop_rows(dukkan, kategori):
+            if not tombstones[row]:
+                live[fused.ids[row]] = (fused, int(row))
+        if delta is not None:
+            for row in delta.shop_rows(dukkan, kategori):
+                if not drop[row]:
+                    live[delta.ids[row]] = (delta, int(row))
+
+        seen = set()
+        for i, item in enumerate(items):
+            pid = item.get("id")
+            seen.add(pid)
+            old = live.get(pid)
+            if old is not None and _same_row(old[0], old[1], item, blocks, i):
+                continue
+            if old is not None:
+                retire(*old)
+            added.append((dukkan, fused.categories.index(kategori), item,
+                          {kind: (mat[i:i + 1], valid[i:i + 1]) for kind, (mat, valid) in blocks.items()}))
+            touched.add(kategori)
+        for pid, old in live.items():
+            if pid not in seen:
+                retire(*old)
+                touched.add(kategori)
+
+    if not touched:
+        return None
+
+    ids, shops, items, codes = [], [], [], []
+    parts = {kind: [] for kind in VECTOR_KINDS}
+    if delta is not None:
+        keep = np.flatnonzero(~drop)
+        ids, shops, items, blocks = _take_rows(delta, keep)
+        codes = delta.codes[keep].tolist()
+        for kind, block in blocks.items():
+            parts[kind].append(block)
+    for dukkan, code, item, blocks in added:
+        ids.append(item["id"])
+        shops.append(dukkan)
+        items.append(item)
+        codes.append(code)
+        for kind, block in blocks.items():
+            parts[kind].append(block)
+
+    new_delta = None
+    if items:
+        new_delta = _assemble("delta", fused.categories, ids, shops, items, codes, parts,
+                              with_ann=False, with_quant=False, lexical_reference=fused.lexical, share=False)
+    return SearchIndex(fused, new_delta, tombstones, pending=current.pending | touched,
+                       delta_since=current.delta_since)
+
+
+def build_index(categories: Optional[List[str]] = None) -> SearchIndex:
+    return SearchIndex(build_fused_index(categories))
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+_reload_lock = threading.Lock()
+
+
+def get_index() -> SearchIndex:
+    """Global indeksi döndürür; ilk çağrıda bir kez oluşturulur."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_index()
+    return _index
+
+
+def index_generation() -> int:
+    """Yayındaki indeksin kuşağı (henüz kurulmadıysa 0); indeksi kurmaya zorlamaz."""
+    current = _index
+    return current.generation if current is not None else 0
+
+
+def _swap(new_index: SearchIndex) -> SearchIndex:
+    global _index
+    with _index_lock:
+        _index = new_index
+    return new_index
+
+
+def _rebuild(current: Optional[SearchIndex], changed: Optional[Set[str]]) -> SearchIndex:
+    """Ana indeksi yeniden kurar; bekleyen delta kategorileri de diskten okunur (_reload_lock altında)."""
+    if current is None or changed is None:
+        return build_index()
+    changed = set(changed) | current.pending
+    if not changed:
+        return current
+    return SearchIndex(build_fused_index(previous=current.fused, changed=changed))
+
+
+def reload_index(changed: Optional[Iterable[str]] = None) -> SearchIndex:
+    """
+    İndeksi yeniden oluşturup global referansı tek atamayla değiştirir.
+    Devam eden aramalar eski indeksi kullanmayı sürdürür (indeksler değiştirilmez).
+    changed: sadece bu kategoriler (+ delta'sı olanlar) diskten okunur; None ise tümü.
+    """
+    with _reload_lock:
+        # Katalog kayıtları indeksten önce güncellenmeli
+        get_catalog().refresh(force=True)
+        return _swap(_rebuild(_index, set(changed) if changed is not None else None))
+
+
+def merge_index() -> SearchIndex:
+    """Delta segmentini ve tombstone'ları ana indekse katar."""
+    return reload_index(changed=())
+
+
+def update_index(changed: Iterable[Tuple[str, str]]) -> SearchIndex:
+    """
+    Değişen (dükkan, kategori) ürün dosyalarını tam yeniden kurulum yapmadan uygular:
+    sadece o dosyalar okunur, değişen ürünler delta segmentine girer. Maliyet değişen dosya ve
+    delta boyutuyla orantılıdır; ana matris kopyalanmaz. Delta + tombstone sayısı
+    search.delta.max_rows'u aşarsa birleştirme yapılır.
+    """
+    with _reload_lock:
+        get_catalog().refresh(force=True)
+        if _index is None:
+            return get_index()
+        new_index = _apply_changes(_index, changed)
+        if new_index is None:
+            return _index
+        stats = new_index.delta_stats()
+        if stats["delta_rows"] + stats["tombstones"] >= int(delta_config().get("max_rows", 2000)):
+            logger.info(f"Delta sınırı aşıldı, birleştiriliyor: {stats}")
+            new_index = _rebuild(new_index, set())
+        return _swap(new_index)
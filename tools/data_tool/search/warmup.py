@@ -0,0 +1,40 @@
+# tools/data_tool/search/warmup.py
+
+import time
+from typing import Dict
+
+from tools.data_tool.catalog import get_catalog
+from tools.data_tool.model_registry import get_model
+from tools.data_tool.search.vector_index import get_index
+
+# Arama yollarının kullandığı modeller (aynı model adları tek örnek paylaşır)
+SEARCH_MODEL_KEYS = ("text_st", "text_clip", "clip")
+
+
+def warm_up(load_models: bool = True) -> Dict[str, float]:
+    """
+    Katalog, vektör indeksi ve (istenirse) modelleri yükler.
+    Aşama sürelerini saniye cinsinden döndürür.
+    """
+    timings: Dict[str, float] = {}
+
+    t = time.perf_counter()
+    get_catalog()
+    timings["catalog"] = round(time.perf_counter() - t, 3)
+
+    t = time.perf_counter()
+    get_index()
+    timings["index"] = round(time.perf_counter() - t, 3)
+
+    if load_models:
+        t = time.perf_counter()
+        import torch  # noqa: F401
+        timings["torch_import"] = round(time.perf_counter() - t, 3)
+
+        for key in SEARCH_MODEL_KEYS:
+            t = time.perf_counter()
+            get_model(key)
+            timings[f"model:{key}"] = round(time.perf_counter() - t, 3)
+
+    timings["total"] = round(sum(timings.values()), 3)
+    return timings
@@ -0,0 +1,151 @@
+# tools/data_tool/vector_store.py
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from config.config_loader import get_config
+from tools.data_tool.text_utils import save_json_atomic
+
+# Ürün kayıtlarında tutulan vektör alanları
+VECTOR_KINDS = ("text_vector_st", "text_vector_clip", "clip_vector", "combined_vector")
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _store_config() -> Dict[str, Any]:
+    return get_config().get("vector_store", {}) or {}
+
+
+def vector_dir(data_dir: Union[str, Path], category: str) -> Path:
+    """data/vectors/<kategori>/ dizini: <tür>.npy + manifest.json"""
+    return Path(data_dir) / "vectors" / category
+
+
+class VectorShard:
+    """Bir dükkan/kategori için mmap ile açılmış vektör matrisleri ve id listesi."""
+
+    def __init__(self, ids: List[str], matrices: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.matrices = matrices
+        self._row_of = {pid: i for i, pid in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_for(self, ids: List[str]) -> np.ndarray:
+        """Verilen id'lerin shard içindeki satırları; bulunmayanlar -1."""
+        return np.array([self._row_of.get(pid, -1) for pid in ids], dtype=np.int64)
+
+
+def _save_npy_atomic(path: Path, arr: np.ndarray) -> None:
+    tmp = path.with_suffix(".npy.tmp")
+    with tmp.open("wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def write_vectors(data_dir: Union[str, Path], category: str, products: List[dict],
+                  dtype: Optional[str] = None) -> Path:
+    """
+    Ürün listesindeki vektörleri <tür>.npy dosyalarına yazar.
+    Eksik vektörler sıfır satır olarak saklanır (okurken geçersiz sayılır).
+    Manifest en son yazılır; okuyucu önce manifest'e bakar.
+    """
+    dtype = np.dtype(dtype or _store_config().get("dtype", "float32"))
+    out_dir = vector_dir(data_dir, category)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ids = [p.get("id") for p in products]
+    dims = {}
+    for kind in VECTOR_KINDS:
+        dim = next((len(p[kind]) for p in products if p.get(kind)), 0)
+        mat = np.zeros((len(products), dim), dtype=dtype)
+        for i, p in enumerate(products):
+            vec = p.get(kind)
+            if vec and len(vec) == dim:
+                mat[i] = vec
+        _save_npy_atomic(out_dir / f"{kind}.npy", mat)
+        dims[kind] = dim
+
+    manifest = {"ids": ids, "dtype": dtype.name, "dims": dims}
+    save_json_atomic(out_dir / MANIFEST_NAME, manifest)
+    return out_dir
+
+
+def load_vectors(data_dir: Union[str, Path], category: str, mmap: bool = True) -> Optional[VectorShard]:
+    """
+    Sidecar vektörleri np.load(mmap_mode="r") ile açar (kopyasız, page cache paylaşımlı).
+    Dosya yoksa ya da manifest ile uyuşmuyorsa None döner.
+    """
+    src = vector_dir(data_dir, category)
+    manifest_path = src / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        ids = manifest["ids"]
+        matrices = {}
+        for kind in VECTOR_KINDS:
+            npy = src / f"{kind}.npy"
+            if not npy.exists():
+                continue
+            mat = np.load(npy, mmap_mode="r" if mmap else None)
+            if mat.shape[0] != len(ids):
+                return None
+            matrices[kind] = mat
+    except (OSError, ValueError, KeyError):
+        return None
+    return VectorShard(ids, matrices)
+
+
+def attach_vectors(data_dir: Union[str, Path], category: str, products: List[dict]) -> int:
+    """
+    JSON'da vektörü olmayan ürünlere sidecar'dan vektör geri yükler.
+    Ops script'lerinin "zaten dolu" kontrolü JSON'dan vektör ayıklandığında da çalışsın diye.
+    """
+    shard = load_vectors(data_dir, category)
+    if shard is None:
+        return 0
+    rows = shard.rows_for([p.get("id") for p in products])
+    filled = 0
+    for p, row in zip(products, rows):
+        if row < 0:
+            continue
+        for kind, mat in shard.matrices.items():
+            if p.get(kind):
+                continue
+            vec = np.asarray(mat[row], dtype=np.float32)
+            if np.any(vec):
+                p[kind] = vec.tolist()
+                filled += 1
+    return filled
+
+
+def sync_vectors(data_dir: Union[str, Path], category: str, products: List[dict]) -> bool:
+    """Sidecar yoksa ya da id listesi JSON ile uyuşmuyorsa yeniden yazar."""
+    if not _store_config().get("enabled", True):
+        return False
+    shard = load_vectors(data_dir, category)
+    if shard is not None and shard.ids == [p.get("id") for p in products]:
+        return False
+    write_vectors(data_dir, category, products)
+    return True
+
+
+def save_products(product_path: Union[str, Path], data_dir: Union[str, Path], category: str,
+                  products: List[dict]) -> None:
+    """
+    Ürünleri JSON'a, vektörleri sidecar .npy dosyalarına yazar.
+    Varsayılan olarak JSON sadece metadata tutar (vector_store.keep_json_vectors=false);
+    embed op'ları eksik vektörleri attach_vectors ile sidecar'dan geri yükler.
+    """
+    store_cfg = _store_config()
+    if store_cfg.get("enabled", True):
+        write_vectors(data_dir, category, products)
+        if not store_cfg.get("keep_json_vectors", False):
+            products = [{k: v for k, v in p.items() if k not in VECTOR_KINDS} for p in products]
+    save_json_atomic(product_path, products)